@@ -1,25 +1,58 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, has_request_context, jsonify, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pandas as pd
 import time
 import os
 import json
+import hashlib
+import gzip
+import heapq
+import multiprocessing
 import random
+import sqlite3
+import struct
+import threading
+import uuid
+import weakref
+import zlib
+from collections import deque
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
 from gql import gql, Client
 from gql.transport.requests import RequestsHTTPTransport
+from gql.transport.exceptions import TransportQueryError
+from gql.utilities import build_client_schema
+from requests.adapters import HTTPAdapter, Retry
+import requests
 from functools import lru_cache
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from auth import require_auth
+from simulation import run_simulation_shard
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # fallback pe json din biblioteca standard
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # fără brotli răspunsurile se comprimă doar cu gzip
+    brotli = None
 
 
 
 ########################3
 #DEPENDINTE EXTERNE
-def fetch_team_season_stats(team_number, season=2025):
-    # Query extins pentru a include și evenimentele (pentru OPR_History)
-    query = gql(f"""    
-    query {{
-      teamByNumber(number: {team_number}) {{
+def _team_season_fields(season):
+    """Câmpurile cerute pentru o echipă - comune query-ului simplu și celui batch"""
+    return f"""
         number
         name
         # Pentru mediile de meci (Net Points, Auto, RP-uri)
@@ -70,13 +103,42 @@ def fetch_team_season_stats(team_number, season=2025):
         quickStats(season: {season}) {{
           tot {{ value }}
         }}
+    """
+
+def fetch_team_season_stats(team_number, season=2025):
+    # Query extins pentru a include și evenimentele (pentru OPR_History)
+    query = gql(f"""
+    query {{
+      teamByNumber(number: {team_number}) {{
+        {_team_season_fields(season)}
       }}
     }}
     """)
 
-    result = client.execute(query)
-    team_data = result['teamByNumber']
+    result = get_gql_client().execute(query)
+    return parse_team_season_stats(result['teamByNumber'], team_number)
+
+def fetch_teams_season_stats_batched(team_numbers, season=2025):
+    """
+    Preia mai multe echipe într-un singur query GraphQL, cu câte un alias per echipă
+    (t19066: teamByNumber(...)). Returnează {team_number: dict} în formatul
+    fetch_team_season_stats.
+    """
+    fields = _team_season_fields(season)
+    aliases = "\n".join(
+        f"t{n}: teamByNumber(number: {n}) {{ {fields} }}" for n in team_numbers
+    )
+    query = gql(f"""
+    query {{
+      {aliases}
+    }}
+    """)
+
+    result = get_gql_client().execute(query)
+    return {n: parse_team_season_stats(result.get(f"t{n}"), n) for n in team_numbers}
 
+def parse_team_season_stats(team_data, team_number):
+    """Transformă răspunsul teamByNumber în mediile de sezon ale echipei"""
     if not team_data or not team_data['matches']:
         return {"error": f"Nu s-au gasit date pentru echipa {team_number}."}
 
@@ -140,28 +202,95 @@ def fetch_team_season_stats(team_number, season=2025):
 
     return season_averages
 
+class TeamIndex:
+    """
+    Index echipă -> rând peste coloanele unui DataFrame de echipe (report_df).
+    Se construiește o singură dată per raport (get_team_index) și înlocuiește
+    scanările teams_data[teams_data['Team'] == team_num], care alocau un DataFrame la fiecare apel.
+    """
+
+    def __init__(self, teams_data):
+        self.teams = teams_data['Team'].to_numpy(dtype=np.int64)
+        self.rows = {int(team): i for i, team in enumerate(self.teams)}
+        self.columns = {col: teams_data[col].to_numpy() for col in teams_data.columns}
+        self.simulation_field = None  # completat lazy de build_simulation_field
+        self.data_hash = None  # completat lazy de report_data_hash
+        self._numeric = {}
+        self._sort_order = np.argsort(self.teams, kind='stable')
+        self._sorted_teams = self.teams[self._sort_order]
+
+    def __contains__(self, team_num):
+        return int(team_num) in self.rows
+
+    def __len__(self):
+        return len(self.teams)
+
+    def value(self, row, col, default=0):
+        """Valoarea din coloana `col` pentru rândul `row` (default dacă coloana lipsește)"""
+        values = self.columns.get(col)
+        return values[row] if values is not None else default
+
+    def numeric(self, col):
+        """Coloana `col` ca array float64 (memorat; zero-uri dacă coloana lipsește)"""
+        if col not in self._numeric:
+            values = self.columns.get(col)
+            self._numeric[col] = (
+                np.zeros(len(self.teams)) if values is None
+                else pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+            )
+        return self._numeric[col]
+
+    def record(self, team_num):
+        """Rândul echipei ca dict (echivalentul row.iloc[0].to_dict()), sau None"""
+        row = self.rows.get(int(team_num))
+        if row is None:
+            return None
+        return {col: values[row] for col, values in self.columns.items()}
+
+    def positions(self, team_numbers):
+        """Indicii rândurilor pentru un array de echipe; -1 pentru echipele necunoscute"""
+        team_numbers = np.asarray(team_numbers, dtype=np.int64)
+        if len(self.teams) == 0:
+            return np.full(team_numbers.shape, -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._sorted_teams, team_numbers), len(self.teams) - 1)
+        return np.where(self._sorted_teams[found] == team_numbers, self._sort_order[found], -1)
+
+def get_team_index(teams_data):
+    """Returnează TeamIndex-ul pentru teams_data, construit o singură dată per obiect DataFrame"""
+    key = id(teams_data)
+    entry = _team_indexes.get(key)
+    if entry is not None and entry[0]() is teams_data:
+        return entry[1]
+
+    index = TeamIndex(teams_data)
+    # Intrarea dispare odată cu DataFrame-ul (raport expirat sau reîmprospătat)
+    ref = weakref.ref(teams_data, lambda _, key=key: _team_indexes.pop(key, None))
+    _team_indexes[key] = (ref, index)
+    return index
+
+_team_indexes = {}
+
 def get_team_full_metrics(team_num, teams_data):
     """
     Extrage setul complet de metrice pentru o echipă din DataFrame-ul teams_data.
     Include acum și valoarea 'Predicted_OPR' necesară pentru simulările de meci.
     """
-    row = teams_data[teams_data['Team'] == team_num]
-
-    if not row.empty:
-        r = row.iloc[0]
+    index = get_team_index(teams_data)
+    row = index.rows.get(int(team_num))
 
+    if row is not None:
         return {
-            'name': r['Name'],
-            'opr': r['OPR_Season'],
-            'Predicted_OPR': r.get('Predicted_OPR', 0), # ADAUGAT AICI
-            'net': r['totalPointsNp'],
-            'auto': r['autoPoints'],
-            'rs': r['ranking_score'],
-            'goal_rate': r.get('GoalRP_Rate', 0),
-            'pattern_rate': r.get('PatternRP_Rate', 0),
-            'move_rate': r.get('MovementRP_Rate', 0),
-            'opr_history': r.get('OPR_History', []),
-            'matches_played': r.get('Matches_Played', 0)
+            'name': index.value(row, 'Name'),
+            'opr': index.value(row, 'OPR_Season'),
+            'Predicted_OPR': index.value(row, 'Predicted_OPR', 0), # ADAUGAT AICI
+            'net': index.value(row, 'totalPointsNp'),
+            'auto': index.value(row, 'autoPoints'),
+            'rs': index.value(row, 'ranking_score'),
+            'goal_rate': index.value(row, 'GoalRP_Rate', 0),
+            'pattern_rate': index.value(row, 'PatternRP_Rate', 0),
+            'move_rate': index.value(row, 'MovementRP_Rate', 0),
+            'opr_history': index.value(row, 'OPR_History', []),
+            'matches_played': index.value(row, 'Matches_Played', 0)
         }
 
     # Fallback: Adăugăm Predicted_OPR: 0 și aici pentru siguranță
@@ -179,25 +308,24 @@ def get_team_full_metrics(team_num, teams_data):
         'matches_played': 0
     }
 
-import numpy as np
-
 def predict_team_opr_weighted(teams_data, team_number, alpha=0.5):
     """
     Predice următorul OPR pentru o echipă folosind Weighted Least Squares
     pe baza coloanei 'OPR_History' din teams_data.
     """
     # 1. Extragem rândul echipei
-    row = teams_data[teams_data['Team'] == team_number]
+    index = get_team_index(teams_data)
+    row = index.rows.get(int(team_number))
 
-    if row.empty:
+    if row is None:
         return 0.0
 
     # 2. Preluăm istoricul OPR (lista de totalPointsNp per eveniment)
-    history = row['OPR_History'].iloc[0]
+    history = index.value(row, 'OPR_History', [])
 
     # Verificare: avem nevoie de cel puțin 2 puncte pentru regresie
-    if not history or len(history) == 0:
-        return row['OPR_Season'].iloc[0] # Fallback la media de sezon
+    if history is None or len(history) == 0:
+        return index.value(row, 'OPR_Season') # Fallback la media de sezon
     if len(history) == 1:
         return float(history[0]) # Nu există trend, returnăm singura valoare
 
@@ -234,31 +362,462 @@ CACHE_DIR = os.path.join(BASE_DIR, '.cache')
 # Creează directorul cache dacă nu există
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-# Cache de date
+# Cache de date (payload-uri încărcate în RAM) și indexul intrărilor de pe disk
 cache = {}
+cache_index = {}
 CACHE_EXPIRY = 7200
+# Stale-while-revalidate pentru rapoartele de eveniment: după CACHE_REFRESH_AFTER raportul
+# e servit în continuare și reconstruit în fundal; după CACHE_HARD_EXPIRY este șters
+CACHE_REFRESH_AFTER = int(os.environ.get('CACHE_REFRESH_AFTER', CACHE_EXPIRY))
+CACHE_HARD_EXPIRY = int(os.environ.get('CACHE_HARD_EXPIRY', 86400))
+CACHE_REFRESH_WORKERS = int(os.environ.get('CACHE_REFRESH_WORKERS', 2))
+
+# Motorul de simulare ('numpy' vectorizat sau 'legacy'); mărimea unui lot e SIM_BATCH_SIZE din simulation.py
+SIMULATION_ENGINE = os.environ.get('SIMULATION_ENGINE', 'numpy')
+
+# Execuție multi-core: simulările sunt împărțite în shard-uri de SIM_SHARD_SIZE, fiecare cu
+# propriul stream RNG; rezultatele nu depind de numărul de workeri
+SIM_WORKERS = int(os.environ.get('SIM_WORKERS', os.cpu_count() or 1))
+SIM_SHARD_SIZE = int(os.environ.get('SIM_SHARD_SIZE', 500))
+# Modul adaptiv: simulări în batch-uri până când intervalele de încredere (95%) scad sub toleranță
+SIM_ADAPTIVE_BATCH = int(os.environ.get('SIM_ADAPTIVE_BATCH', 100))
+SIM_ADAPTIVE_MIN = int(os.environ.get('SIM_ADAPTIVE_MIN', 200))
+SIM_ADAPTIVE_TOLERANCE = float(os.environ.get('SIM_ADAPTIVE_TOLERANCE', 0.25))
+SIM_ADAPTIVE_PROB_TOLERANCE = float(os.environ.get('SIM_ADAPTIVE_PROB_TOLERANCE', 0.02))
+SIM_ADAPTIVE_TOP_N = int(os.environ.get('SIM_ADAPTIVE_TOP_N', 10))
+SIM_ADAPTIVE_TIME_BUDGET = float(os.environ.get('SIM_ADAPTIVE_TIME_BUDGET', 10))
+# Simulări per mesaj pe endpoint-urile de streaming
+SIM_STREAM_CHUNK = int(os.environ.get('SIM_STREAM_CHUNK', 50))
+SIM_MAX_SIMULATIONS = int(os.environ.get('SIM_MAX_SIMULATIONS', 100000))
+# Joburi asincrone de simulare: câte rulează simultan, câte pot aștepta, câte per client
+SIM_JOB_WORKERS = int(os.environ.get('SIM_JOB_WORKERS', 2))
+SIM_JOB_QUEUE_DEPTH = int(os.environ.get('SIM_JOB_QUEUE_DEPTH', 16))
+SIM_JOB_MAX_PER_CLIENT = int(os.environ.get('SIM_JOB_MAX_PER_CLIENT', 4))
+SIM_JOB_TTL = int(os.environ.get('SIM_JOB_TTL', 3600))
+# Distribuția pe tot terenul: percentilele și pragurile top-N raportate
+FIELD_PERCENTILES = (5, 25, 50, 75, 95)
+FIELD_TOP_N = (1, 4, 10, 20)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'sqlite')
+CACHE_EVICT_INTERVAL = int(os.environ.get('CACHE_EVICT_INTERVAL', 300))
+
+# Configurație fetch echipe (modul 'batched', 'concurrent' sau 'serial')
+FETCH_MODE = os.environ.get('FETCH_MODE', 'batched')
+FETCH_BATCH_SIZE = int(os.environ.get('FETCH_BATCH_SIZE', 20))
+FETCH_CONCURRENCY = int(os.environ.get('FETCH_CONCURRENCY', 8))
+# Bugetul de timp (wall-clock) al unui task de fetch - un grup batch sau o echipă - cu tot cu reîncercări
+FETCH_TEAM_TIMEOUT = float(os.environ.get('FETCH_TEAM_TIMEOUT', 20))
+FETCH_RETRY_BACKOFF = 0.5
+# Transportul HTTP partajat: timeout-uri (conectare, citire) și reîncercări la nivel HTTP (429/5xx/conexiune),
+# singurul nivel de reîncercări pentru fetch-ul echipelor
+FETCH_CONNECT_TIMEOUT = float(os.environ.get('FETCH_CONNECT_TIMEOUT', 5))
+FETCH_READ_TIMEOUT = float(os.environ.get('FETCH_READ_TIMEOUT', FETCH_TEAM_TIMEOUT))
+FETCH_HTTP_RETRIES = int(os.environ.get('FETCH_HTTP_RETRIES', 2))
+# După un introspection eșuat, schema nu mai e cerută timp de atâtea secunde (query-urile merg fără validare)
+GRAPHQL_SCHEMA_RETRY_AFTER = int(os.environ.get('GRAPHQL_SCHEMA_RETRY_AFTER', 300))
+# Limitatorul adaptiv (token bucket + AIMD) pentru toate cererile către ftcscout, în cereri/secundă
+UPSTREAM_RATE_INITIAL = float(os.environ.get('UPSTREAM_RATE_INITIAL', 10))
+UPSTREAM_RATE_MIN = float(os.environ.get('UPSTREAM_RATE_MIN', 0.5))
+UPSTREAM_RATE_MAX = float(os.environ.get('UPSTREAM_RATE_MAX', 50))
+UPSTREAM_RATE_INCREASE = float(os.environ.get('UPSTREAM_RATE_INCREASE', 0.1))  # +cereri/s la fiecare răspuns sănătos
+UPSTREAM_RATE_DECREASE = float(os.environ.get('UPSTREAM_RATE_DECREASE', 0.5))  # factor la eroare / vârf de latență
+UPSTREAM_LATENCY_SPIKE = float(os.environ.get('UPSTREAM_LATENCY_SPIKE', 2.0))  # x media latenței
+UPSTREAM_LATENCY_FLOOR = float(os.environ.get('UPSTREAM_LATENCY_FLOOR', 3.0))  # secunde (query-urile batch sunt lente firesc)
+
+# Cache per echipă (team_number, season), comun tuturor evenimentelor
+TEAM_CACHE_EXPIRY = int(os.environ.get('TEAM_CACHE_EXPIRY', 21600))
+# Lista de meciuri: TTL scurt cât timp evenimentul e în desfășurare, lung după ce s-a terminat
+MATCHES_CACHE_LIVE_TTL = int(os.environ.get('MATCHES_CACHE_LIVE_TTL', 120))
+MATCHES_CACHE_FINISHED_TTL = int(os.environ.get('MATCHES_CACHE_FINISHED_TTL', 604800))
+# Compresia răspunsurilor /api (gzip/brotli, negociată după Accept-Encoding)
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+# Cererile condiționate (ETag / Last-Modified): clientul revalidează după HTTP_CACHE_MAX_AGE secunde
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+
+def team_cache_key(team_number, season):
+    """Cheia de cache pentru statisticile de sezon ale unei echipe"""
+    return f"team_{team_number}_{season}"
+
+def encode_report_frame(df):
+    """
+    Descompune un DataFrame în array-uri NumPy, câte unul (sau două) per coloană:
+    - coloanele numerice/bool - array-ul lor, cu dtype-ul păstrat
+    - coloanele de liste (OPR_History) - valorile concatenate + offset-uri (n + 1)
+    - coloanele de text - array unicode; orice altceva - JSON (octeți uint8)
+    Returnează (arrays, columns), unde columns descrie fiecare coloană pentru decodare.
+    """
+    arrays = {}
+    columns = []
+    for i, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        kind = 'json'
+        if values.dtype.kind in 'biuf':
+            arrays[f"c{i}"] = values
+            kind = 'numeric'
+        elif all(isinstance(v, (list, tuple)) for v in values):
+            try:
+                arrays[f"c{i}"] = np.array([x for v in values for x in v], dtype=np.float64)
+                arrays[f"c{i}_offsets"] = np.cumsum([0] + [len(v) for v in values], dtype=np.int64)
+                kind = 'ragged'
+            except (TypeError, ValueError):
+                pass
+        elif all(isinstance(v, str) for v in values):
+            arrays[f"c{i}"] = values.astype(str)
+            kind = 'string'
+        if kind == 'json':
+            arrays[f"c{i}"] = np.frombuffer(json.dumps(values.tolist(), default=str).encode('utf-8'), dtype=np.uint8)
+        columns.append({'name': name, 'kind': kind})
+    return arrays, columns
+
+def decode_report_frame(archive, columns):
+    """Inversul encode_report_frame: reconstruiește DataFrame-ul din array-uri (nume -> array)"""
+    data = {}
+    for i, column in enumerate(columns):
+        values = archive[f"c{i}"]
+        if column['kind'] == 'ragged':
+            offsets = archive[f"c{i}_offsets"]
+            flat = values.tolist()
+            values = [flat[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        elif column['kind'] == 'string':
+            values = values.astype(object)
+        elif column['kind'] == 'json':
+            values = json.loads(values.tobytes().decode('utf-8'))
+        data[column['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+# Formatul pe coloane: MAGIC + lungimea header-ului (uint32) + header JSON + buffere aliniate la 8 octeți
+REPORT_FRAME_MAGIC = b'PRCF'
+
+def encode_cache_payload(payload):
+    """
+    Payload de cache -> bytes. Rapoartele (payload cu 'frame' = DataFrame) sunt scrise pe coloane:
+    un header JSON (restul câmpurilor + descrierea coloanelor) urmat de buffer-ele brute ale
+    array-urilor. Restul payload-urilor rămân JSON.
+    """
+    frame = payload.get('frame') if isinstance(payload, dict) else None
+    if not isinstance(frame, pd.DataFrame):
+        return encode_json(payload)
+
+    arrays, columns = encode_report_frame(frame)
+    buffers = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        buffers[name] = [array.dtype.str, list(array.shape), offset]
+        offset += (array.nbytes + 7) // 8 * 8
+
+    meta = {k: v for k, v in payload.items() if k != 'frame'}
+    header = json.dumps({'meta': meta, 'columns': columns, 'buffers': buffers}, default=str).encode('utf-8')
+    header += b' ' * (-(len(REPORT_FRAME_MAGIC) + 4 + len(header)) % 8)
+
+    parts = [REPORT_FRAME_MAGIC, struct.pack('<I', len(header)), header]
+    for array in arrays.values():
+        parts.append(array.tobytes())
+        parts.append(b'\0' * (-array.nbytes % 8))
+    return b''.join(parts)
+
+def decode_cache_payload(blob):
+    """
+    bytes -> payload de cache; recunoaște formatul pe coloane după REPORT_FRAME_MAGIC, altfel JSON.
+    Coloanele numerice sunt view-uri np.frombuffer peste o singură copie a blob-ului.
+    """
+    if bytes(blob[:4]) != REPORT_FRAME_MAGIC:
+        return json.loads(blob)
+
+    (header_size,) = struct.unpack_from('<I', blob, 4)
+    header = json.loads(bytes(blob[8:8 + header_size]))
+    data = bytearray(blob)  # copie modificabilă - array-urile din DataFrame nu sunt read-only
+    base = 8 + header_size
+    arrays = {}
+    for name, (dtype, shape, offset) in header['buffers'].items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape)) if shape else 1
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=base + offset).reshape(shape)
+
+    meta = header['meta']
+    meta['frame'] = decode_report_frame(arrays, header['columns'])
+    return meta
+
+def report_payload_records(payload):
+    """Payload-ul unui raport în formatul JSON istoric ('data' = listă de rânduri)"""
+    frame = payload.get('frame') if isinstance(payload, dict) else None
+    if not isinstance(frame, pd.DataFrame):
+        return payload
+    records = dict(payload, data=frame.to_dict(orient='records'))
+    del records['frame']
+    return records
+
+class JsonFileCacheBackend:
+    """
+    Backend-ul istoric: câte un fișier .json per cheie în CACHE_DIR.
+    Expirarea și mărimea fiecărei chei sunt ținute și într-un manifest (index.manifest),
+    ca indexul de la startup să nu citească payload-urile. Manifestul e actualizat
+    sub un lock de fișier, deci mai multe procese nu își pierd intrările între ele.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._manifest_path = os.path.join(directory, 'index.manifest')
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextmanager
+    def _manifest_lock(self):
+        # Thread-urile se sincronizează prin _lock, procesele prin flock pe index.manifest.lock
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self._manifest_path}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update_manifest(self, update):
+        """Recitește manifestul de pe disk, aplică update(manifest) și îl rescrie atomic (False = nicio schimbare)"""
+        with self._manifest_lock():
+            manifest = self._load_manifest()
+            if update(manifest) is not False:
+                self._write_atomic(self._manifest_path, manifest)
+            self._manifest = manifest
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _write_atomic(self, path, payload):
+        # Scriere atomică: fișier temporar în același director, apoi rename
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(report_payload_records(payload), f, default=str)
+        os.replace(tmp_path, path)
+
+    def _read(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def get(self, key):
+        """Returnează payload-ul dacă nu a expirat, altfel None"""
+        data = self._read(key)
+        if data and data.get('_expiry') and datetime.now() < datetime.fromisoformat(data['_expiry']):
+            return data
+        return None
+
+    def expiry(self, key):
+        if key in self._manifest:
+            return self._manifest[key][0]
+        try:
+            # Fișierele vechi, fără manifest, au fost scrise cu CACHE_EXPIRY
+            return os.stat(self._path(key)).st_mtime + CACHE_EXPIRY
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, payload, expiry_ts):
+        path = self._path(key)
+        self._write_atomic(path, payload)
+        size = os.path.getsize(path)
+        self._update_manifest(lambda manifest: manifest.__setitem__(key, [expiry_ts, size]))
+        return size
 
-def get_cache_file(key):
-    """Obține path-ul fisierului de cache"""
-    return os.path.join(CACHE_DIR, f"{key}.json")
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        self._update_manifest(lambda manifest: manifest.pop(key, None) is not None)
+
+    def index(self):
+        """Returnează [(key, expiry_ts, size)] doar din manifest și stat(), fără a citi fișierele"""
+        self._manifest = self._load_manifest()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                key = entry.name[:-5]
+                st = entry.stat()
+                expiry_ts = self._manifest[key][0] if key in self._manifest else st.st_mtime + CACHE_EXPIRY
+                entries.append((key, expiry_ts, st.st_size))
+        return entries
+
+    def evict_expired(self):
+        now = time.time()
+        expired = [key for key, expiry_ts, _ in self.index() if expiry_ts <= now]
+        for key in expired:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        if expired:
+            self._update_manifest(lambda manifest: [manifest.pop(key, None) for key in expired])
+        return len(expired)
+
+
+class SQLiteCacheBackend:
+    """
+    Cache într-un singur fișier SQLite (mod WAL).
+    Expirarea este o coloană indexată, deci verificările nu mai parsează JSON-ul,
+    iar fiecare scriere este o tranzacție atomică - sigură și cu mai multe procese.
+    Rapoartele sunt stocate pe coloane (vezi encode_cache_payload), restul ca JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    expiry REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expiry ON cache_entries(expiry)")
+
+    def _conn(self):
+        # Conexiunile sqlite3 nu se partajează între thread-uri sau procese (fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT payload FROM cache_entries WHERE key = ? AND expiry > ?",
+            (key, time.time())
+        ).fetchone()
+        return decode_cache_payload(row[0]) if row else None
+
+    def expiry(self, key):
+        row = self._conn().execute(
+            "SELECT expiry FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, payload, expiry_ts):
+        blob = encode_cache_payload(payload)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, payload, expiry, size, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, blob, expiry_ts, len(blob), time.time())
+            )
+        return len(blob)
+
+    def delete(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def index(self):
+        return self._conn().execute(
+            "SELECT key, expiry, size FROM cache_entries WHERE expiry > ?", (time.time(),)
+        ).fetchall()
+
+    def evict_expired(self):
+        with self._conn() as conn:
+            return conn.execute(
+                "DELETE FROM cache_entries WHERE expiry <= ?", (time.time(),)
+            ).rowcount
+
+    def import_json_files(self, directory):
+        """Migrează o singură dată fișierele .json ale backend-ului vechi în SQLite"""
+        legacy = JsonFileCacheBackend(directory)
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-5]
+            try:
+                if self.expiry(key) is not None:
+                    continue
+                # Fișierele expirate nu se migrează și nici nu se șterg
+                data = legacy.get(key)
+                if data is None:
+                    continue
+                if 'event_name' in data and isinstance(data.get('data'), list):
+                    # Rapoartele trec direct în formatul pe coloane
+                    data = dict(data, frame=pd.DataFrame(data['data']))
+                    del data['data']
+                self.set(key, data, datetime.fromisoformat(data['_expiry']).timestamp())
+                print(f"📦 Migrat în SQLite: {key}")
+                # Fișierul vechi se șterge doar după ce intrarea e salvată în SQLite
+                legacy.delete(key)
+            except Exception as e:
+                print(f"⚠️ Eroare la migrarea {filename}: {e}")
+
+
+def create_cache_backend(kind=None):
+    """Creează backend-ul de cache configurat prin CACHE_BACKEND ('sqlite' sau 'json')"""
+    kind = kind or CACHE_BACKEND
+    if kind == 'json':
+        return JsonFileCacheBackend(CACHE_DIR)
+    backend = SQLiteCacheBackend(os.path.join(CACHE_DIR, 'cache.sqlite3'))
+    backend.import_json_files(CACHE_DIR)
+    return backend
+
+# Creat de init_runtime()
+cache_backend = None
 
 def load_cache_from_disk():
-    """Încarcă cache-ul din fisierele salvate"""
-    global cache
-    if not os.path.exists(CACHE_DIR):
-        return
-    
-    for filename in os.listdir(CACHE_DIR):
-        if filename.endswith('.json'):
-            filepath = os.path.join(CACHE_DIR, filename)
+    """
+    Construiește la startup doar indexul cache-ului (cheie, expirare, mărime).
+    Intrările expirate sunt șterse fără a fi citite, iar payload-urile se încarcă
+    abia la primul acces (get_cache). Returnează durata în milisecunde.
+    """
+    started = time.perf_counter()
+    removed = cache_backend.evict_expired()
+    cache_index.clear()
+    for key, expiry_ts, size in cache_backend.index():
+        cache_index[key] = (expiry_ts, size)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📦 Index cache construit în {elapsed_ms:.1f} ms - {len(cache_index)} intrări, {removed} expirate șterse")
+    return elapsed_ms
+
+def evict_expired_cache():
+    """Șterge intrările expirate din RAM, din index și de pe disk"""
+    now = datetime.now()
+    for key, (_, expiry_time_str) in list(cache.items()):
+        if not expiry_time_str or datetime.fromisoformat(expiry_time_str) <= now:
+            cache.pop(key, None)
+    now_ts = now.timestamp()
+    for key, (expiry_ts, _) in list(cache_index.items()):
+        if expiry_ts <= now_ts:
+            cache_index.pop(key, None)
+    removed = cache_backend.evict_expired()
+    if removed:
+        print(f"🧹 Cache: {removed} intrări expirate șterse")
+
+def start_cache_evictor(interval=None):
+    """Pornește thread-ul de fundal care curăță periodic cache-ul expirat"""
+    interval = interval or CACHE_EVICT_INTERVAL
+
+    def loop():
+        while True:
+            time.sleep(interval)
             try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    key = filename[:-5]  # Elimini .json
-                    cache[key] = (data, data.get('_expiry'))
-                    print(f"✨ Încărcat din disk: {key}")
+                evict_expired_cache()
             except Exception as e:
-                print(f"⚠️ Eroare la încărcarea {filename}: {e}")
+                print(f"⚠️ Eroare la curățarea cache-ului: {e}")
+
+    threading.Thread(target=loop, name='cache-evictor', daemon=True).start()
 
 def get_cache(key):
     """Obține din cache (memoria sau disk) dacă nu a expirat"""
@@ -270,161 +829,996 @@ def get_cache(key):
             if datetime.now() < expiry_time:
                 print(f"✨ Cache HIT (RAM) pentru {key}")
                 return data
-        # Cache a expirat, șterge-l
-        del cache[key]
-        cache_file = get_cache_file(key)
-        if os.path.exists(cache_file):
-            os.remove(cache_file)
+        # Cache a expirat - îl scoatem din RAM; de pe disk îl șterge thread-ul de curățare
+        cache.pop(key, None)
+        cache_index.pop(key, None)
         return None
-    
-    # 2. FALLBACK: Încearcă să găsească pe disk dacă nu e în RAM
-    cache_file = get_cache_file(key)
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                expiry_time_str = data.get('_expiry')
-                
-                # Verifică dacă a expirat
-                if expiry_time_str:
-                    expiry_time = datetime.fromisoformat(expiry_time_str)
-                    if datetime.now() < expiry_time:
-                        # Cache valid! Încarcă-l în RAM pentru viitoare
-                        cache[key] = (data, expiry_time_str)
-                        print(f"✨ Cache HIT (DISK) pentru {key} - reîncărcat în RAM")
-                        return data
-                    else:
-                        # Cache expirat, șterge-l
-                        os.remove(cache_file)
-                        print(f"⏰ Cache expirat pentru {key}")
-                        return None
-        except Exception as e:
-            print(f"⚠️ Eroare la citirea cache din disk ({key}): {e}")
-            return None
-    
-    return None
 
-def set_cache(key, data):
-    """Salvează în cache și pe disk - NU suprascrie dacă deja există și e valid"""
-    cache_file = get_cache_file(key)
-    
-    # VERIFICARE: Dacă fișierul deja există și e valid, NU rescrie pe disk
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'r') as f:
-                existing_data = json.load(f)
-                expiry_time_str = existing_data.get('_expiry')
-                
-                # Dacă cache-ul nu a expirat, nu rescriu nimic
-                if expiry_time_str:
-                    expiry_time = datetime.fromisoformat(expiry_time_str)
-                    if datetime.now() < expiry_time:
-                        print(f"✅ Cache deja există și e valid pentru {key} - NU rescriu")
-                        # Doar încarcă în RAM dacă nu e deja acolo
-                        if key not in cache:
-                            cache[key] = (existing_data, expiry_time_str)
-                        return
-        except Exception as e:
-            print(f"⚠️ Eroare la verificarea cache existent: {e}")
-    
+    # 2. Indexul știe deja că intrarea a expirat - nu mai citim payload-ul
+    indexed = cache_index.get(key)
+    if indexed and indexed[0] <= time.time():
+        cache_index.pop(key, None)
+        return None
+
+    # 3. FALLBACK: Încarcă payload-ul de pe disk la primul acces
+    #    (și pentru chei lipsă din index - pot fi scrise de alt proces)
+    try:
+        data = cache_backend.get(key)
+    except Exception as e:
+        print(f"⚠️ Eroare la citirea cache din disk ({key}): {e}")
+        return None
+
+    if data is not None:
+        # Cache valid! Încarcă-l în RAM pentru viitoare
+        cache[key] = (data, data.get('_expiry'))
+        print(f"✨ Cache HIT (DISK) pentru {key} - reîncărcat în RAM")
+    return data
+
+def is_cache_stale(data):
+    """True dacă intrarea a depășit pragul de refresh (_refresh_at), dar nu și expirarea"""
+    refresh_at = data.get('_refresh_at') if isinstance(data, dict) else None
+    return bool(refresh_at) and datetime.now() >= datetime.fromisoformat(refresh_at)
+
+def set_cache(key, data, ttl=None, refresh_after=None, force=False):
+    """
+    Salvează în cache și pe disk - NU suprascrie dacă deja există și e valid (doar cu force=True).
+    ttl (secunde) suprascrie CACHE_EXPIRY pentru intrarea respectivă.
+    refresh_after (secunde) marchează momentul după care intrarea devine "stale" (_refresh_at).
+    """
+    # VERIFICARE: Dacă intrarea deja există și e validă, NU rescrie pe disk (lookup indexat)
+    try:
+        existing_expiry = None if force else cache_backend.expiry(key)
+        if existing_expiry and time.time() < existing_expiry:
+            print(f"✅ Cache deja există și e valid pentru {key} - NU rescriu")
+            # Doar încarcă în RAM dacă nu e deja acolo
+            if key not in cache:
+                existing_data = cache_backend.get(key)
+                if existing_data is not None:
+                    cache[key] = (existing_data, existing_data.get('_expiry'))
+            return
+    except Exception as e:
+        print(f"⚠️ Eroare la verificarea cache existent: {e}")
+
     # Dacă nu există sau a expirat, rescrie complet
-    expiry_time = datetime.now() + timedelta(seconds=CACHE_EXPIRY)
+    expiry_time = datetime.now() + timedelta(seconds=ttl or CACHE_EXPIRY)
     expiry_str = expiry_time.isoformat()
-    
-    # Convertim DataFrame în dict pentru serializare JSON
+    updated_str = datetime.now().isoformat()
+
+    # Rapoartele păstrează DataFrame-ul ('frame'); backend-ul îl serializează pe coloane
     if isinstance(data, tuple) and len(data) == 2:
         df, event_name = data
-        # Convertim DataFrame în JSON-serializable format
         json_data = {
-            'data': df.to_dict(orient='records'),
+            'frame': df,
             'event_name': event_name,
-            '_expiry': expiry_str
+            'failed_teams': df.attrs.get('failed_teams', []),
+            '_expiry': expiry_str,
+            '_updated_at': updated_str
         }
     else:
-        json_data = {'_expiry': expiry_str, 'data': data}
-    
+        json_data = {'_expiry': expiry_str, '_updated_at': updated_str, 'data': data}
+
+    if refresh_after:
+        json_data['_refresh_at'] = (datetime.now() + timedelta(seconds=refresh_after)).isoformat()
+
     cache[key] = (json_data, expiry_str)
-    
+
     # Salvez pe disk
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(json_data, f, default=str)
+        size = cache_backend.set(key, json_data, expiry_time.timestamp())
+        cache_index[key] = (expiry_time.timestamp(), size)
         print(f"💾 Salvat (NOU) în cache (disk): {key}")
     except Exception as e:
         print(f"⚠️ Eroare la salvare cache: {e}")
 
+##############################
+# RĂSPUNSURI JSON (encoder rapid + compresie)
+##############################
+
+def frame_to_json(df, shape='records'):
+    """
+    DataFrame -> JSON (bytes) prin encoder-ul C din pandas, fără dict-uri per rând.
+    shape='records': [{col: val, ...}, ...]; shape='columns': {col: [val, ...], ...}
+    """
+    if shape == 'columns':
+        return b'{' + b','.join(
+            json.dumps(str(col)).encode('utf-8') + b':' + df[col].to_json(orient='values', force_ascii=False).encode('utf-8')
+            for col in df.columns
+        ) + b'}'
+    return df.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+def encode_json(obj, shape='records'):
+    """
+    Serializează un răspuns în JSON (bytes) cu orjson (dacă e instalat) sau json.
+    Tipurile NumPy sunt convertite direct, iar DataFrame-urile sunt codate de frame_to_json
+    și inserate în locul unui marcaj unic - fără conversia recursivă a întregului arbore.
+    """
+    frames = []
+    token = uuid.uuid4().hex
+
+    def default(value):
+        if isinstance(value, pd.DataFrame):
+            frames.append(frame_to_json(value, shape))
+            return f"{token}{len(frames) - 1}"
+        if isinstance(value, (np.ndarray, pd.Series)):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (set, tuple)):
+            return list(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+    if orjson is not None:
+        data = orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, default=default).encode('utf-8')
+    for i, frame_json in enumerate(frames):
+        data = data.replace(f'"{token}{i}"'.encode('utf-8'), frame_json, 1)
+    return data
+
+def response_shape():
+    """Forma cerută pentru tabele: 'records' (implicit) sau 'columns' (?shape=columns)"""
+    if has_request_context() and request.args.get('shape') == 'columns':
+        return 'columns'
+    return 'records'
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider-ul JSON al aplicației: jsonify() trece prin encode_json"""
+
+    def dumps(self, obj, **kwargs):
+        # Opțiunile de formatare (indent, sort_keys...) rămân la provider-ul implicit
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return encode_json(obj, response_shape()).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode_json(obj, response_shape()) + b"\n", mimetype=self.mimetype)
+
+def negotiate_encoding(accept_encoding, streamed=False):
+    """
+    Alege 'br' sau 'gzip' după valorile q din Accept-Encoding (q=0 înseamnă refuzat;
+    la egalitate preferăm br); None dacă identity e preferat. Streaming-ul folosește doar gzip.
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get('*', 0)
+    candidates = ['br', 'gzip'] if brotli is not None and not streamed else ['gzip']
+    best = max(candidates, key=lambda name: accepted.get(name, wildcard))
+    q = accepted.get(best, wildcard)
+    if q <= 0 or q < accepted.get('identity', 0):
+        return None
+    return best
+
+def gzip_stream(chunks):
+    """Comprimă un răspuns în streaming; fiecare mesaj e trimis imediat (Z_SYNC_FLUSH)"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
 app = Flask(__name__, static_folder=STATIC_DIR, static_url_path='')
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Încarcă cache-ul din disk la startup
-load_cache_from_disk()
+@app.after_request
+def compress_response(response):
+    """Comprimă răspunsurile /api (gzip sau brotli), după Accept-Encoding"""
+    if (not request.path.startswith('/api/') or response.direct_passthrough
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''), response.is_streamed)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = gzip_stream(response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(data, COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    # Reprezentarea comprimată are propriul ETag tare ("<etag>-gzip" / "<etag>-br")
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+def cache_entry_version(key, served=None, select=None):
+    """
+    (versiune, moment scriere) ale intrării de cache din RAM, sau None.
+    Cu select, versiunea e întoarsă doar dacă select(intrare) este exact valoarea servită
+    (un refresh în fundal poate înlocui intrarea între citire și răspuns).
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    data = entry[0]
+    if select is not None and select(data) is not served:
+        return None
+    return data.get('_expiry'), data.get('_updated_at')
+
+def report_entry_version(cache_key, report_df):
+    """Versiunea intrării de cache din care provine report_df (vezi _report_from_cache)"""
+    def select(data):
+        memo = _report_frames.get(cache_key)
+        if memo and memo[0] == data.get('_expiry'):
+            return memo[1]
+        return data.get('frame')
+    return cache_entry_version(cache_key, report_df, select)
+
+def http_validators(parts, updated_at=()):
+    """
+    (etag, last_modified) pentru un răspuns derivat din intrări de cache.
+    parts: tot ce determină corpul (versiunile intrărilor + parametrii cererii);
+    None dacă vreo versiune lipsește - răspunsul nu poate fi revalidat.
+    """
+    if any(part is None for part in parts):
+        return None
+    etag = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+    times = [datetime.fromisoformat(t).astimezone(timezone.utc) for t in updated_at if t]
+    return etag, max(times) if times else None
+
+def not_modified_response(validators):
+    """
+    Răspuns 304 dacă cererea condiționată (If-None-Match / If-Modified-Since) se potrivește,
+    altfel None. Se apelează înainte de a construi corpul, ca revalidarea să nu serializeze nimic.
+    """
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    if request.if_none_match:
+        # If-None-Match are prioritate; acceptă și variantele comprimate ale aceluiași ETag
+        if request.if_none_match.star_tag:
+            matched = etag
+        else:
+            matched = next((tag for tag in request.if_none_match.as_set(include_weak=True)
+                            if tag == etag or tag in (f"{etag}-gzip", f"{etag}-br")), None)
+        if matched is None:
+            return None
+    elif not (request.if_modified_since and last_modified
+              and last_modified.replace(microsecond=0) <= request.if_modified_since):
+        return None
+    else:
+        matched = etag
+
+    response = app.response_class(status=304)
+    with_http_cache(response, (matched, last_modified))
+    response.vary.add('Accept-Encoding')
+    return response
+
+def with_http_cache(response, validators):
+    """Adaugă ETag (tare), Last-Modified și Cache-Control pe un răspuns revalidabil"""
+    if validators is not None:
+        etag, last_modified = validators
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers['Cache-Control'] = f"private, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate"
+    return response
+
+CACHE_STARTUP_MS = 0.0
+
+# Fetch-uri în desfășurare (single-flight) și lock-urile între procese
+_inflight = {}
+_inflight_lock = threading.Lock()
+# Echipele în curs de preluare: cheia din cache-ul per echipă -> Future cu (stats, eroare)
+_team_inflight = {}
+_team_inflight_lock = threading.Lock()
+LOCK_DIR = os.path.join(CACHE_DIR, 'locks')
+# Cheile sunt distribuite pe un număr fix de fișiere de lock (nu câte unul per cheie)
+LOCK_STRIPES = int(os.environ.get('LOCK_STRIPES', 64))
+_stripe_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+# Rapoartele reconstituite din cache: cache_key -> (versiune, report_df, event_name)
+_report_frames = {}
+
+# Pool-ul de procese pentru simulări (creat lazy)
+_simulation_pool = None
+_simulation_pool_lock = threading.Lock()
+
+# Reîmprospătări în fundal (stale-while-revalidate)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_refresh_executor = None
+
+# Joburi asincrone de simulare: job_id -> job (executorul e separat de thread-urile Flask)
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_executor = None
+
+def init_runtime():
+    """
+    Starea procesului server: backend-ul de cache (cu migrarea fișierelor vechi), indexul
+    cache-ului, thread-ul de curățare, directorul de lock-uri și executorii de fundal.
+    Nu rulează când modulul e re-importat ca __mp_main__ de workerii de simulare.
+    """
+    global cache_backend, CACHE_STARTUP_MS, _refresh_executor, _job_executor
+    cache_backend = create_cache_backend()
+
+    # Construiește indexul cache-ului la startup (payload-urile se încarcă lazy)
+    CACHE_STARTUP_MS = load_cache_from_disk()
+    start_cache_evictor()
+
+    # DEBUG: Afișează ce e în cache
+    print(f"\n📦 Cache loader STARTUP - {len(cache_index)} intrări în index")
+    if cache_index:
+        for key in list(cache_index.keys())[:5]:  # Arată primele 5
+            print(f"   - {key}")
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    for name in os.listdir(LOCK_DIR):
+        # Fișierele per cheie lăsate de versiunile anterioare
+        if name.endswith('.lock') and not name.startswith('stripe-'):
+            try:
+                os.remove(os.path.join(LOCK_DIR, name))
+            except OSError:
+                pass
+
+    _refresh_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix='cache-refresh')
+    _job_executor = ThreadPoolExecutor(max_workers=SIM_JOB_WORKERS, thread_name_prefix='sim-job')
 
-# DEBUG: Afișează ce e în cache
-print(f"\n📦 Cache loader STARTUP - {len(cache)} intrări în memorie")
-if cache:
-    for key in list(cache.keys())[:5]:  # Arată primele 5
-        print(f"   - {key}")
+# Workerii de simulare (forkserver/spawn) re-importă scriptul principal ca __mp_main__
+if __name__ != '__mp_main__':
+    init_runtime()
 
 # Configurație GraphQL
-transport = RequestsHTTPTransport(url="https://api.ftcscout.org/graphql")
-client = Client(transport=transport, fetch_schema_from_transport=True)
+GRAPHQL_URL = os.environ.get('GRAPHQL_URL', "https://api.ftcscout.org/graphql")
+# Schema: fișierul livrat lângă app.py, altfel copia salvată în cache după primul fetch
+GRAPHQL_SCHEMA_FILE = os.environ.get('GRAPHQL_SCHEMA_FILE', os.path.join(BASE_DIR, 'graphql_schema.json'))
+GRAPHQL_SCHEMA_CACHE_FILE = os.path.join(CACHE_DIR, 'schema', 'graphql_schema.json')
+_gql_local = threading.local()
+_gql_schema = None
+_gql_schema_retry_at = 0.0
+_gql_schema_lock = threading.Lock()
+_http_session = None
+_http_session_pid = None
+_http_session_lock = threading.Lock()
+
+def _process_lock(key):
+    """
+    Lock exclusiv pentru `key`, partajat între procesele worker: cheia e mapată pe unul
+    din cele LOCK_STRIPES fișiere (locks/stripe-NN.lock). Cheile de pe același stripe se
+    serializează, deci funcțiile rulate sub lock nu trebuie să ia alt _process_lock.
+    Pe platforme fără fcntl rămâne doar coalescing-ul între thread-uri.
+    """
+    if fcntl is None:
+        return nullcontext()
+    stripe = zlib.crc32(key.encode('utf-8')) % LOCK_STRIPES
+
+    @contextmanager
+    def locked():
+        # flock e per descriptor: și thread-urile aceluiași proces se exclud, deci
+        # lock-ul de thread doar evită descriptorii deschiși inutil
+        with _stripe_locks[stripe], open(os.path.join(LOCK_DIR, f"stripe-{stripe:02d}.lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return locked()
+
+def single_flight(key, fn):
+    """
+    Request coalescing: primul apelant pentru `key` execută fn(), iar apelanții
+    simultani din același proces așteaptă și primesc același rezultat.
+    Între procese, execuția e serializată prin _process_lock - de aceea fn trebuie
+    să re-verifice cache-ul înainte de a face fetch.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not is_leader:
+        print(f"⏳ Așteptăm fetch-ul deja pornit pentru {key}")
+        return future.result()
+
+    try:
+        with _process_lock(key):
+            result = fn()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+class LimitedRetry(Retry):
+    """
+    Reîncercările urllib3 (erori de conexiune, 429, 5xx) trec și ele prin upstream_limiter:
+    fiecare răspuns respins e raportat ca eroare, iar reîncercarea așteaptă un token.
+    O reîncercare a cărei pauză (backoff sau Retry-After) depășește bugetul task-ului de fetch
+    al thread-ului nu mai are loc. Ultima încercare eșuată e raportată de PooledRequestsHTTPTransport.execute.
+    """
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        deadline = getattr(_gql_local, 'deadline', None)
+        if deadline is not None:
+            response = kwargs.get('response')
+            pause = (response is not None and retry.get_retry_after(response)) or retry.get_backoff_time()
+            if time.monotonic() + pause >= deadline:
+                # Ridică MaxRetryError, ca la reîncercări epuizate
+                return self.new(total=0).increment(*args, **kwargs)
+        upstream_limiter.record(0.0, ok=False)
+        upstream_limiter.acquire()
+        return retry
+
+def get_http_session():
+    """
+    Sesiunea HTTP keep-alive partajată de toți clienții GraphQL din proces: pool de
+    FETCH_CONCURRENCY conexiuni și reîncercări cu backoff pentru erori de conexiune, 429 și 5xx.
+    Se recreează după fork (conexiunile nu pot fi partajate între procese).
+    """
+    global _http_session, _http_session_pid
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max(FETCH_CONCURRENCY, 1),
+                max_retries=LimitedRetry(
+                    total=FETCH_HTTP_RETRIES,
+                    backoff_factor=FETCH_RETRY_BACKOFF,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=None,  # și POST - query-urile GraphQL sunt idempotente
+                    respect_retry_after_header=True,
+                )
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session, _http_session_pid = session, os.getpid()
+        return _http_session
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket cu rată adaptivă (AIMD), partajat de toate thread-urile procesului.
+    acquire() rezervă un token (așteaptă dacă bucket-ul e gol); record() ajustează rata:
+    - eroare sau latență > max(UPSTREAM_LATENCY_FLOOR, UPSTREAM_LATENCY_SPIKE x media):
+      rata se înmulțește cu UPSTREAM_RATE_DECREASE (cel mult o dată pe secundă)
+    - răspuns sănătos: rata crește cu UPSTREAM_RATE_INCREASE cereri/s, până la max_rate
+    """
+
+    def __init__(self, rate=None, min_rate=None, max_rate=None, burst=None):
+        self.rate = rate or UPSTREAM_RATE_INITIAL
+        self.min_rate = min_rate or UPSTREAM_RATE_MIN
+        self.max_rate = max_rate or UPSTREAM_RATE_MAX
+        self.burst = burst or max(FETCH_CONCURRENCY, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.latency_ewma = None
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.backoffs = 0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Rezervă un token; returnează câte secunde a așteptat apelantul"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def record(self, latency, ok=True):
+        """Rezultatul unei cereri: latența (secunde) și dacă upstream-ul a răspuns corect"""
+        with self.lock:
+            self.requests += 1
+            spike = (self.latency_ewma is not None
+                     and latency > max(UPSTREAM_LATENCY_FLOOR, UPSTREAM_LATENCY_SPIKE * self.latency_ewma))
+            if ok:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            else:
+                self.errors += 1
+
+            now = time.monotonic()
+            if not ok or spike:
+                if now - self.last_decrease >= 1.0:
+                    self.rate = max(self.min_rate, self.rate * UPSTREAM_RATE_DECREASE)
+                    self.last_decrease = now
+                    self.backoffs += 1
+                    print(f"🐢 Upstream {'eroare' if not ok else f'lent ({latency:.1f}s)'} - rata scade la {self.rate:.1f} cereri/s")
+            else:
+                self.rate = min(self.max_rate, self.rate + UPSTREAM_RATE_INCREASE)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'rate': round(self.rate, 2),
+                'min_rate': self.min_rate,
+                'max_rate': self.max_rate,
+                'burst': self.burst,
+                'tokens': round(min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate), 2),
+                'latency_ewma_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                'requests': self.requests,
+                'errors': self.errors,
+                'backoffs': self.backoffs,
+                'waited_s': round(self.waited, 2),
+            }
+
+upstream_limiter = AdaptiveRateLimiter()
+
+class PooledRequestsHTTPTransport(RequestsHTTPTransport):
+    """
+    RequestsHTTPTransport care folosește sesiunea partajată (get_http_session) și
+    limitatorul upstream_limiter. Client.execute face connect()/close() la fiecare query;
+    transportul original deschidea de fiecare dată o sesiune nouă, deci o conexiune TLS nouă per query.
+    """
+
+    def connect(self):
+        self.session = get_http_session()
+
+    def close(self):
+        # Sesiunea rămâne deschisă pentru următoarele query-uri
+        self.session = None
+
+    def execute(self, request, **kwargs):
+        # Fiecare cerere trece prin limitatorul procesului, care își ajustează rata după rezultat
+        upstream_limiter.acquire()
+        started = time.monotonic()
+        deadline = getattr(_gql_local, 'deadline', None)
+        if deadline is not None:
+            # Timeout-urile HTTP nu depășesc ce a rămas din bugetul task-ului de fetch
+            remaining = deadline - started
+            if remaining <= 0:
+                raise TimeoutError(f"Timeout după {FETCH_TEAM_TIMEOUT:.0f}s")
+            kwargs['timeout'] = (min(FETCH_CONNECT_TIMEOUT, remaining), min(FETCH_READ_TIMEOUT, remaining))
+        try:
+            result = super().execute(request, **kwargs)
+        except TransportQueryError:
+            # Eroare GraphQL în răspuns - upstream-ul a răspuns, query-ul e problema
+            upstream_limiter.record(time.monotonic() - started, ok=True)
+            raise
+        except Exception:
+            upstream_limiter.record(time.monotonic() - started, ok=False)
+            raise
+        upstream_limiter.record(time.monotonic() - started, ok=True)
+        return result
+
+def get_graphql_schema():
+    """
+    Schema GraphQL, fără rețea la pornire: din GRAPHQL_SCHEMA_FILE sau din copia din cache.
+    Dacă niciuna nu există, e cerută o singură dată (introspection) și salvată în cache.
+    Returnează None dacă schema nu poate fi obținută - query-urile merg și fără validare locală.
+    Un eșec e ținut minte GRAPHQL_SCHEMA_RETRY_AFTER secunde, ca thread-urile de fetch
+    să nu reîncerce pe rând introspection-ul cât timp API-ul e căzut.
+    """
+    global _gql_schema, _gql_schema_retry_at
+    if _gql_schema is not None or time.time() < _gql_schema_retry_at:
+        return _gql_schema
+
+    with _gql_schema_lock:
+        if _gql_schema is not None or time.time() < _gql_schema_retry_at:
+            return _gql_schema
+        for path in (GRAPHQL_SCHEMA_FILE, GRAPHQL_SCHEMA_CACHE_FILE):
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        _gql_schema = build_client_schema(json.load(f))
+                    print(f"📐 Schema GraphQL încărcată din {path}")
+                    return _gql_schema
+                except Exception as e:
+                    print(f"⚠️ Schema GraphQL invalidă în {path}: {e}")
+
+        try:
+            print("📐 Preluăm schema GraphQL (introspection)...")
+            schema_client = Client(
+                transport=PooledRequestsHTTPTransport(url=GRAPHQL_URL, timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT)),
+                fetch_schema_from_transport=True
+            )
+            with schema_client:
+                pass
+            os.makedirs(os.path.dirname(GRAPHQL_SCHEMA_CACHE_FILE), exist_ok=True)
+            tmp_path = f"{GRAPHQL_SCHEMA_CACHE_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(schema_client.introspection, f)
+            os.replace(tmp_path, GRAPHQL_SCHEMA_CACHE_FILE)
+            _gql_schema = schema_client.schema
+        except Exception as e:
+            _gql_schema_retry_at = time.time() + GRAPHQL_SCHEMA_RETRY_AFTER
+            print(f"⚠️ Nu s-a putut prelua schema GraphQL (reîncercăm în {GRAPHQL_SCHEMA_RETRY_AFTER}s): {e}")
+        return _gql_schema
+
+def get_gql_client():
+    """
+    Returnează client-ul GraphQL al thread-ului curent.
+    Client-ul gql nu poate executa query-uri simultan din mai multe thread-uri,
+    așa că fiecare worker are propriul client; toți folosesc aceeași sesiune HTTP
+    (pool keep-alive) și aceeași schemă locală.
+    """
+    gql_client = getattr(_gql_local, 'client', None)
+    if gql_client is None:
+        transport = PooledRequestsHTTPTransport(
+            url=GRAPHQL_URL, timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT)
+        )
+        gql_client = Client(transport=transport, schema=get_graphql_schema())
+        _gql_local.client = gql_client
+    return gql_client
+
+def collect_team_stats(teams_list, season=2025, fetch_mode=None, max_workers=None, refresh=False):
+    """
+    Colectează statisticile de sezon pentru toate echipele unui eveniment.
+    Echipele găsite în cache-ul per echipă nu mai sunt cerute din API; cele noi
+    sunt salvate acolo, cu TEAM_CACHE_EXPIRY. Cu refresh=True toate echipele sunt
+    cerute din nou, iar cache-ul per echipă este suprascris (echipele care eșuează rămân
+    cu datele din cache).
+    O echipă aflată deja în curs de preluare (de exemplu pentru alt eveniment construit în paralel)
+    nu e cerută din nou: se așteaptă rezultatul acelui fetch.
+    Fiecare task de fetch (grup batch sau echipă) are la dispoziție FETCH_TEAM_TIMEOUT secunde;
+    un grup batch eșuat sau expirat e reluat ca task-uri individuale, deci echipele bune rămân.
+    Returnează (all_team_stats, failed_teams):
+    - all_team_stats păstrează ordinea din teams_list (același rezultat ca modul serial)
+    - failed_teams este lista echipelor eșuate, cu motivul erorii
+    """
+    fetch_mode = fetch_mode or FETCH_MODE
+    results = [None] * len(teams_list)
+    failed_teams = []
+
+    owned = {}  # echipele preluate de acest apel: team_num -> Future așteptat de celelalte apeluri
+
+    def publish(team_num, stats, error):
+        future = owned.pop(team_num, None)
+        if future is not None:
+            with _team_inflight_lock:
+                _team_inflight.pop(team_cache_key(team_num, season), None)
+            future.set_result((stats, error))
+
+    def record(i, team_num, stats=None, error=None, store=True):
+        try:
+            if error is None and stats and isinstance(stats, dict) and "error" not in stats:
+                if store:
+                    set_cache(team_cache_key(team_num, season), stats, ttl=TEAM_CACHE_EXPIRY, force=refresh)
+                results[i] = dict(stats, OPR_History=list(stats.get('OPR_History', [])), Predicted_OPR=0.0)
+                return
+            if error is None:
+                error = stats.get('error') if isinstance(stats, dict) else "Răspuns gol"
+            if refresh:
+                # La refresh, o eroare trecătoare nu scoate echipa din raport: păstrăm statisticile din cache
+                cached_stats = get_cache(team_cache_key(team_num, season))
+                if cached_stats:
+                    print(f"\n♻️ Echipa {team_num} nu a putut fi reîmprospătată ({error}), păstrăm datele din cache")
+                    cached = cached_stats['data']
+                    results[i] = dict(cached, OPR_History=list(cached.get('OPR_History', [])), Predicted_OPR=0.0)
+                    return
+            failed_teams.append({'team': int(team_num), 'error': str(error)})
+        finally:
+            publish(team_num, stats, error)
+
+    # 1. Echipele deja prezente în cache-ul per echipă sau în curs de preluare
+    to_fetch = []
+    following = []  # (poziție, echipă, Future-ul fetch-ului în desfășurare)
+    for i, team_num in enumerate(teams_list):
+        cached_stats = None if refresh else get_cache(team_cache_key(team_num, season))
+        if cached_stats:
+            stats = cached_stats['data']
+            results[i] = dict(stats, OPR_History=list(stats.get('OPR_History', [])), Predicted_OPR=0.0)
+            continue
+        with _team_inflight_lock:
+            future = _team_inflight.get(team_cache_key(team_num, season))
+            if future is None:
+                owned[team_num] = _team_inflight[team_cache_key(team_num, season)] = Future()
+        if future is None:
+            to_fetch.append(team_num)
+        else:
+            following.append((i, team_num, future))
+
+    # 2. Preluăm restul din API
+    positions = {team_num: i for i, team_num in enumerate(teams_list)}
+    print(f"📡 {len(teams_list) - len(to_fetch) - len(following)} echipe din cache, "
+          f"{len(following)} în curs de preluare, {len(to_fetch)} de preluat din API")
+
+    try:
+        fetch_teams(to_fetch, positions, record, season, fetch_mode, max_workers)
+    finally:
+        # Celelalte apeluri nu rămân să aștepte echipele nepreluate (excepție neprevăzută)
+        for team_num in list(owned):
+            publish(team_num, None, "Preluare întreruptă")
+
+    # 3. Echipele preluate de alt apel
+    for i, team_num, future in following:
+        stats, error = future.result()
+        record(i, team_num, stats, error, store=False)
+
+    all_team_stats = [stats for stats in results if stats is not None]
+    failed_teams.sort(key=lambda f: f['team'])
+    return all_team_stats, failed_teams
+
+def fetch_teams(to_fetch, positions, record, season=2025, fetch_mode=None, max_workers=None):
+    """
+    Preia din API echipele din to_fetch și raportează fiecare rezultat prin
+    record(poziție, echipă, stats=..., error=...), din thread-ul apelantului.
+    """
+    if fetch_mode == 'serial':
+        for k, team_num in enumerate(to_fetch):
+            i = positions[team_num]
+            try:
+                print(f"[{k+1}/{len(to_fetch)}] Analizăm echipa {team_num}...", end="\r")
+                record(i, team_num, fetch_team_season_stats(team_num, season))
+            except Exception as e:
+                print(f"\n⚠️ Eroare la echipa {team_num}: {e}")
+                record(i, team_num, error=e)
+    elif to_fetch:
+        # Task-uri de fetch: grupuri de echipe (un query batch) sau câte o echipă
+        batched = fetch_mode == 'batched'
+        size = FETCH_BATCH_SIZE if batched else 1
+        chunks = [to_fetch[i:i + size] for i in range(0, len(to_fetch), size)]
+        max_workers = max_workers or FETCH_CONCURRENCY
+        tasks = []
+        started = {}
+
+        def run(k):
+            chunk, as_batch = tasks[k]
+            started[k] = time.monotonic()
+            # Termenul task-ului (FETCH_TEAM_TIMEOUT de la pornire) limitează și cererile HTTP și reîncercările lor
+            _gql_local.deadline = started[k] + FETCH_TEAM_TIMEOUT
+            try:
+                if as_batch:
+                    return fetch_teams_season_stats_batched(chunk, season)
+                return {chunk[0]: fetch_team_season_stats(chunk[0], season)}
+            finally:
+                _gql_local.deadline = None
+
+        def submit(chunk, as_batch):
+            tasks.append((chunk, as_batch))
+            future = executor.submit(run, len(tasks) - 1)
+            futures[future] = len(tasks) - 1
+            pending.add(future)
+
+        def fail(future, error):
+            for team_num in tasks[futures[future]][0]:
+                print(f"\n⚠️ Eroare la echipa {team_num}: {error}")
+                record(positions[team_num], team_num, error=error)
+
+        def fail_or_split(future, error):
+            # Un query batch eșuat nu compromite tot grupul: echipele lui devin task-uri individuale
+            chunk, as_batch = tasks[futures[future]]
+            if as_batch and len(chunk) > 1:
+                print(f"\n⚠️ Query batch eșuat pentru {len(chunk)} echipe ({error}), trecem pe fetch individual")
+                for team_num in chunk:
+                    submit([team_num], False)
+            else:
+                fail(future, error)
+
+        def collect(future):
+            try:
+                chunk_results = future.result()
+            except Exception as e:
+                fail_or_split(future, e)
+                return
+            for team_num in tasks[futures[future]][0]:
+                record(positions[team_num], team_num, chunk_results.get(team_num))
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='team-fetch')
+        futures = {}
+        pending = set()
+        try:
+            for chunk in chunks:
+                submit(chunk, batched)
+            expired = []  # task-uri peste termen; thread-ul lor se eliberează când expiră timeout-ul HTTP
+            while pending:
+                now = time.monotonic()
+                for future in [f for f in pending if not f.done() and futures[f] in started
+                                and now - started[futures[f]] >= FETCH_TEAM_TIMEOUT]:
+                    pending.discard(future)
+                    expired.append(future)
+                    fail_or_split(future, f"Timeout după {FETCH_TEAM_TIMEOUT:.0f}s")
+                if pending and sum(not f.done() for f in expired) >= max_workers:
+                    # Toți workerii sunt blocați în task-uri expirate: restul nu mai pot porni
+                    for future in pending:
+                        if future.cancel():
+                            fail(future, "Nepreluată: conexiunile către API au depășit timpul")
+                        else:
+                            fail(future, f"Timeout după {FETCH_TEAM_TIMEOUT:.0f}s")
+                    break
+                remaining = [started[futures[f]] + FETCH_TEAM_TIMEOUT - now for f in pending if futures[f] in started]
+                done, pending = wait(pending, timeout=max(0.0, min(remaining, default=1.0)),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def _report_from_cache(cache_key, cached_data=None):
+    """
+    Reconstituie (report_df, event_name) din cache, sau None dacă nu există.
+    DataFrame-ul (și TeamIndex-ul lui) se construiește o singură dată per versiune
+    a intrării de cache și e refolosit la următoarele hit-uri.
+    """
+    cached_data = cached_data or get_cache(cache_key)
 
-def get_event_season_report(event_code, season=2025):
-    """Colectează și procesează datele de echipe pentru un eveniment"""
-    # Verifică cache
-    cache_key = f"{event_code}_{season}"
-    cached_data = get_cache(cache_key)
-    
     if cached_data:
         try:
-            # Reconstituie DataFrame din dict
-            df = pd.DataFrame(cached_data['data'])
+            version = cached_data.get('_expiry')
+            memo = _report_frames.get(cache_key)
+            if memo and memo[0] == version:
+                print(f"✨ Cache HIT pentru {cache_key}! Se folosesc datele cached.")
+                return memo[1], memo[2]
+
+            # DataFrame-ul decodat pe coloane, sau reconstituit din rânduri (cache JSON vechi)
+            df = cached_data.get('frame')
+            if df is None:
+                df = pd.DataFrame(cached_data['data'])
+            df.attrs['failed_teams'] = cached_data.get('failed_teams', [])
             event_name = cached_data['event_name']
-            print(f"✨ Cache HIT pentru {event_code}_{season}! Se folosesc datele cached.")
+            get_team_index(df)
+            _report_frames[cache_key] = (version, df, event_name)
+            print(f"✨ Cache HIT pentru {cache_key}! Se folosesc datele cached.")
             return df, event_name
         except Exception as e:
             print(f"⚠️ Eroare la reconstructia cache: {e}")
             # Dacă nu poți reconstrui, continua cu fetch-ul normal
-    
-    try:
-        # 1. Luăm lista de echipe de la eveniment
-        print(f"📡 Preluăm lista de echipe pentru {event_code}...")
-        event_query = gql(f"""
-        query {{
-          eventByCode(code: "{event_code}", season: {season}) {{
-            name
-            teams {{
-              team {{
-                number
-              }}
-            }}
-          }}
-        }}
-        """)
+    return None
+
+def get_event_season_report(event_code, season=2025, fetch_mode=None):
+    """
+    Colectează și procesează datele de echipe pentru un eveniment.
+    Echipele care nu au putut fi preluate sunt raportate în report_df.attrs['failed_teams'].
+    La cache miss, cererile simultane pentru același eveniment fac un singur crawl
+    (single_flight), iar celelalte așteaptă rezultatul lui.
+    Un raport mai vechi de CACHE_REFRESH_AFTER este servit imediat și reconstruit în fundal.
+    """
+    # Verifică cache
+    cache_key = f"{event_code}_{season}"
+    cached_data = get_cache(cache_key)
+    cached_report = _report_from_cache(cache_key, cached_data) if cached_data else None
+    if cached_report:
+        if is_cache_stale(cached_data):
+            schedule_report_refresh(event_code, season, fetch_mode)
+        return cached_report
 
-        event_res = client.execute(event_query)
-        teams_list = [t['team']['number'] for t in event_res['eventByCode']['teams']]
-        event_name = event_res['eventByCode']['name']
+    def load_or_build():
+        # Re-verificăm cache-ul: alt thread/proces poate să-l fi completat între timp
+        return _report_from_cache(cache_key) or _build_event_season_report(event_code, season, fetch_mode)
 
-        print(f"✅ Am găsit {len(teams_list)} echipe. Începem colectarea datelor...")
+    return single_flight(cache_key, load_or_build)
 
-        all_team_stats = []
+def iter_event_season_reports(event_codes, season=2025, max_workers=None):
+    """
+    Rapoartele mai multor evenimente, generate pe măsură ce sunt gata:
+    (event_code, report_df, event_name), cu report_df None și eroarea în event_name la eșec.
+    Rapoartele din cache vin imediat; celelalte sunt construite în paralel prin
+    get_event_season_report (single-flight per eveniment), iar fiecare apare de îndată ce
+    echipele lui sunt preluate. Echipele comune sunt cerute o singură dată: collect_team_stats
+    așteaptă fetch-urile deja în desfășurare.
+    """
+    event_codes = list(dict.fromkeys(event_codes))
+    missing = []
+    for event_code in event_codes:
+        if get_cache(f"{event_code}_{season}"):
+            yield (event_code, *get_event_season_report(event_code, season))
+        else:
+            missing.append(event_code)
+    if not missing:
+        return
 
-        for i, team_num in enumerate(teams_list):
+    executor = ThreadPoolExecutor(max_workers=min(len(missing), max_workers or FETCH_CONCURRENCY),
+                                  thread_name_prefix='event-report')
+    try:
+        futures = {executor.submit(get_event_season_report, event_code, season): event_code for event_code in missing}
+        for future in as_completed(futures):
             try:
-                print(f"[{i+1}/{len(teams_list)}] Analizăm echipa {team_num}...", end="\r")
-                stats = fetch_team_season_stats(team_num, season)
+                yield (futures[future], *future.result())
+            except Exception as e:
+                print(f"❌ Eroare la raportul pentru {futures[future]}: {e}")
+                yield futures[future], None, str(e)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-                if stats and isinstance(stats, dict) and "error" not in stats:
-                    stats['Predicted_OPR'] = 0.0
-                    all_team_stats.append(stats)
+def schedule_report_refresh(event_code, season=2025, fetch_mode=None):
+    """Programează reconstruirea în fundal a unui raport stale (o singură dată per eveniment)"""
+    cache_key = f"{event_code}_{season}"
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
 
-                time.sleep(0.05)  # Redus de la 0.1 pentru viteză
-            except Exception as e:
-                print(f"\n⚠️ Eroare la echipa {team_num}: {e}")
-                continue
+    def refresh():
+        try:
+            # Alt proces poate să fi reîmprospătat deja raportul - verificăm direct pe disk
+            stored = cache_backend.get(cache_key)
+            if stored is not None and not is_cache_stale(stored):
+                cache[cache_key] = (stored, stored.get('_expiry'))
+                return
+            print(f"🔄 Reîmprospătăm în fundal raportul pentru {cache_key}...")
+            _build_event_season_report(event_code, season, fetch_mode, refresh=True)
+        except Exception as e:
+            print(f"⚠️ Eroare la reîmprospătarea {cache_key}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+
+    _refresh_executor.submit(single_flight, f"refresh_{cache_key}", refresh)
+
+def fetch_event_teams(event_code, season=2025):
+    """Lista de echipe și numele unui eveniment: (teams_list, event_name)"""
+    print(f"📡 Preluăm lista de echipe pentru {event_code}...")
+    event_query = gql(f"""
+    query {{
+      eventByCode(code: "{event_code}", season: {season}) {{
+        name
+        teams {{
+          team {{
+            number
+          }}
+        }}
+      }}
+    }}
+    """)
+
+    event_res = get_gql_client().execute(event_query)
+    teams_list = [t['team']['number'] for t in event_res['eventByCode']['teams']]
+    return teams_list, event_res['eventByCode']['name']
+
+def _build_event_season_report(event_code, season=2025, fetch_mode=None, refresh=False):
+    """
+    Crawl-ul propriu-zis: lista de echipe a evenimentului + statisticile fiecărei echipe.
+    Cu refresh=True cere din nou toate echipele și suprascrie raportul existent; echipele
+    care eșuează rămân cu datele din cache-ul per echipă sau cu rândul din raportul anterior.
+    """
+    cache_key = f"{event_code}_{season}"
+    try:
+        # 1. Luăm lista de echipe de la eveniment
+        teams_list, event_name = fetch_event_teams(event_code, season)
+
+        print(f"✅ Am găsit {len(teams_list)} echipe. Începem colectarea datelor...")
 
-        if not all_team_stats:
+        all_team_stats, failed_teams = collect_team_stats(teams_list, season, fetch_mode, refresh=refresh)
+
+        # La refresh, echipele eșuate fără date în cache își păstrează rândul din raportul anterior
+        previous_rows = None
+        if refresh and failed_teams:
+            previous = _report_from_cache(cache_key)
+            if previous is not None:
+                failed_numbers = {f['team'] for f in failed_teams}
+                previous_rows = previous[0][previous[0]['Team'].isin(failed_numbers)]
+                kept = set(previous_rows['Team'].astype(int))
+                if kept:
+                    print(f"\n♻️ Păstrăm din raportul anterior echipele {', '.join(str(t) for t in sorted(kept))}")
+                failed_teams = [f for f in failed_teams if f['team'] not in kept]
+
+        if failed_teams:
+            print(f"\n⚠️ {len(failed_teams)} echipe nu au putut fi preluate: "
+                  f"{', '.join(str(f['team']) for f in failed_teams)}")
+
+        if not all_team_stats and (previous_rows is None or previous_rows.empty):
             return None, "Nu s-au putut colecta date pentru nicio echipă!"
 
         # 2. Creăm DataFrame-ul
@@ -439,6 +1833,8 @@ def get_event_season_report(event_code, season=2025):
         ]
 
         report_df = report_df.reindex(columns=cols)
+        if previous_rows is not None and not previous_rows.empty:
+            report_df = pd.concat([report_df, previous_rows.reindex(columns=cols)], ignore_index=True)
 
         # Convertim Team și Matches_Played la int
         report_df['Team'] = report_df['Team'].astype(int)
@@ -447,12 +1843,14 @@ def get_event_season_report(event_code, season=2025):
         # Sortăm după ranking_score
         sort_by = 'ranking_score' if 'ranking_score' in report_df.columns else report_df.columns[0]
         report_df = report_df.sort_values(by=sort_by, ascending=False)
+        report_df.attrs['failed_teams'] = failed_teams
 
         print(f"\n✨ Raport finalizat pentru {event_name}!")
         
         # Salvez în cache
         result = (report_df, event_name)
-        set_cache(cache_key, result)
+        set_cache(cache_key, result, ttl=CACHE_HARD_EXPIRY, refresh_after=CACHE_REFRESH_AFTER, force=refresh)
+        invalidate_simulation_memos(event_code, season)
         
         return result
 
@@ -552,66 +1950,175 @@ def generate_ftc_schedule_pro(teams_data, matches_per_team=6, max_retries=50):
     
     return pd.DataFrame(schedule), duplicate_alliance_count
 
-def run_full_schedule_prediction_v5(schedule_df, teams_data):
+def generate_ftc_schedule_heap(teams_data, matches_per_team=6, seed=None, lookahead=8):
     """
-    Generează predicții pentru meciuri folosind OPR și statistici echipelor
+    Generator incremental de program FTC, bazat pe un heap.
+    Echipele stau într-un heap cu cheia (meciuri jucate, tie-break aleator), deci la fiecare meci
+    ies echipele cu cele mai puține meciuri. Partenerii și adversarii repetați, precum și
+    meciurile consecutive, sunt ținuți incremental: dintre cele 3 împărțiri posibile în alianțe
+    o alegem pe cea cu cele mai puține repetări, iar dacă tot există repetări încercăm
+    înlocuitori cu același număr de meciuri (până la `lookahead` echipe scoase din heap).
+    Returnează (schedule_df, duplicate_alliance_count, quality_report).
     """
-    predictions = []
+    rng = random.Random(seed)
+    teams_list = [int(team) for team in teams_data['Team'].tolist()]
+    num_teams = len(teams_list)
+    total_matches = int(num_teams * matches_per_team / 4) if num_teams >= 4 else 0
+
+    # Heap: (meciuri jucate, tie-break aleator, echipă)
+    heap = [(0, rng.random(), team) for team in teams_list]
+    heapq.heapify(heap)
+    last_match = {}
+    partner_counts = {}
+    opponent_counts = {}
+    gaps = []
+
+    def pair(a, b):
+        return (a, b) if a < b else (b, a)
+
+    def evaluate(entries, m):
+        """Cea mai bună împărțire în alianțe pentru 4 echipe și costul ei (repetări + odihnă)"""
+        a, b, c, d = [entry[2] for entry in entries]
+        rest_penalty = sum(5 for team in (a, b, c, d) if last_match.get(team) == m - 1)
+        best = None
+        for red, blue in (((a, b), (c, d)), ((a, c), (b, d)), ((a, d), (b, c))):
+            partner_repeats = partner_counts.get(pair(*red), 0) + partner_counts.get(pair(*blue), 0)
+            opponent_repeats = sum(opponent_counts.get(pair(x, y), 0) for x in red for y in blue)
+            cost = 10 * partner_repeats + opponent_repeats + rest_penalty
+            if best is None or cost < best[0]:
+                best = (cost, red, blue)
+        return best
 
-    for _, row in schedule_df.iterrows():
-        r1, r2 = int(row['Red 1']), int(row['Red 2'])
-        b1, b2 = int(row['Blue 1']), int(row['Blue 2'])
-
-        # Preluăm datele echipelor
-        r1_s = get_team_full_metrics(r1, teams_data)
-        r2_s = get_team_full_metrics(r2, teams_data)
-        b1_s = get_team_full_metrics(b1, teams_data)
-        b2_s = get_team_full_metrics(b2, teams_data)
-
-        # Sume alianțe
-        red_opr = r1_s['opr'] + r2_s['opr']
-        blue_opr = b1_s['opr'] + b2_s['opr']
-        red_net = r1_s['net'] + r2_s['net']
-        blue_net = b1_s['net'] + b2_s['net']
-        red_auto = r1_s['auto'] + r2_s['auto']
-        blue_auto = b1_s['auto'] + b2_s['auto']
-        red_rs = r1_s['rs'] + r2_s['rs']
-        blue_rs = b1_s['rs'] + b2_s['rs']
-
-        # Algoritm predicție winner
-        if red_opr > blue_opr:
-            winner = "🔴 ROȘU"
-            win_margin = abs(red_opr - blue_opr)
-        elif blue_opr > red_opr:
-            winner = "🔵 ALBASTRU"
-            win_margin = abs(red_opr - blue_opr)
-        else:
-            winner = "⚪ EGAL"
-            win_margin = 0
+    schedule = []
+    for m in range(total_matches):
+        chosen = [heapq.heappop(heap) for _ in range(4)]
+        cost, red, blue = evaluate(chosen, m)
+
+        # Încercăm înlocuitori cu același număr de meciuri (distribuția rămâne uniformă)
+        extra = []
+        if cost > 0:
+            extra = [heapq.heappop(heap) for _ in range(min(lookahead - 4, len(heap)))]
+            tier = chosen[3][0]
+            alternates = [entry for entry in extra if entry[0] == tier]
+            best_choice = chosen
+            for i in [i for i in range(4) if chosen[i][0] == tier]:
+                for alt in alternates:
+                    trial = chosen[:i] + [alt] + chosen[i + 1:]
+                    trial_cost, trial_red, trial_blue = evaluate(trial, m)
+                    if trial_cost < cost:
+                        cost, red, blue, best_choice = trial_cost, trial_red, trial_blue, trial
+                if cost == 0:
+                    break
+            extra = [entry for entry in chosen + extra if entry not in best_choice]
+            chosen = best_choice
+
+        for count, _, team in chosen:
+            if team in last_match:
+                gaps.append(m - last_match[team])
+            last_match[team] = m
+            heapq.heappush(heap, (count + 1, rng.random(), team))
+        for entry in extra:
+            heapq.heappush(heap, entry)
+
+        for alliance in (red, blue):
+            key = pair(*alliance)
+            partner_counts[key] = partner_counts.get(key, 0) + 1
+        for x in red:
+            for y in blue:
+                key = pair(x, y)
+                opponent_counts[key] = opponent_counts.get(key, 0) + 1
 
-        predictions.append({
-            'Match': int(row['Match']),
-            'Red 1': r1,
-            'Red 1 Name': r1_s['name'],
-            'Red 2': r2,
-            'Red 2 Name': r2_s['name'],
-            'Blue 1': b1,
-            'Blue 1 Name': b1_s['name'],
-            'Blue 2': b2,
-            'Blue 2 Name': b2_s['name'],
-            'Red OPR': round(red_opr, 2),
-            'Blue OPR': round(blue_opr, 2),
-            'Red NET': round(red_net, 2),
-            'Blue NET': round(blue_net, 2),
-            'Red AUTO': round(red_auto, 2),
-            'Blue AUTO': round(blue_auto, 2),
-            'Red RS': round(red_rs, 2),
-            'Blue RS': round(blue_rs, 2),
-            'Winner': winner,
-            'Win Margin': round(win_margin, 2)
+        schedule.append({
+            'Match': m + 1,
+            'Red 1': red[0],
+            'Red 2': red[1],
+            'Blue 1': blue[0],
+            'Blue 2': blue[1]
         })
 
-    return predictions
+    match_counts = [entry[0] for entry in heap]
+    quality = {
+        'duplicate_partners': sum(count - 1 for count in partner_counts.values() if count > 1),
+        'duplicate_opponents': sum(count - 1 for count in opponent_counts.values() if count > 1),
+        'min_gap': min(gaps) if gaps else None,
+        'back_to_back': sum(1 for gap in gaps if gap == 1),
+        'min_matches_per_team': min(match_counts) if match_counts else 0,
+        'max_matches_per_team': max(match_counts) if match_counts else 0,
+    }
+
+    return pd.DataFrame(schedule), quality['duplicate_partners'], quality
+
+def run_full_schedule_prediction_v5(schedule_df, teams_data):
+    """
+    Generează predicții pentru meciuri folosind OPR și statistici echipelor.
+    Calculul este columnar: metricile celor 4 sloturi se extrag prin indexare în array-urile
+    din TeamIndex, iar sumele de alianță și câștigătorii se calculează pentru tot programul deodată.
+    """
+    if len(schedule_df) == 0:
+        return []
+
+    index = get_team_index(teams_data)
+    slot_cols = ['Red 1', 'Red 2', 'Blue 1', 'Blue 2']
+    teams = schedule_df[slot_cols].to_numpy(dtype=np.int64)  # (meciuri, 4)
+    rows = index.positions(teams.ravel()).reshape(teams.shape)
+    known = rows >= 0
+    safe_rows = np.where(known, rows, 0)
+
+    def gather(col):
+        # Echipele necunoscute au metricile 0 (ca în get_team_full_metrics)
+        return np.where(known, index.numeric(col)[safe_rows], 0.0)
+
+    def alliance_sums(col):
+        values = gather(col)
+        return values[:, 0] + values[:, 1], values[:, 2] + values[:, 3]
+
+    # Sume alianțe
+    red_opr, blue_opr = alliance_sums('OPR_Season')
+    red_net, blue_net = alliance_sums('totalPointsNp')
+    red_auto, blue_auto = alliance_sums('autoPoints')
+    red_rs, blue_rs = alliance_sums('ranking_score')
+
+    # Algoritm predicție winner
+    winner = np.select([red_opr > blue_opr, blue_opr > red_opr], ["🔴 ROȘU", "🔵 ALBASTRU"], "⚪ EGAL")
+    win_margin = np.where(red_opr != blue_opr, np.abs(red_opr - blue_opr), 0)
+
+    names = np.asarray(index.columns['Name'], dtype=object)[safe_rows]
+    names[~known] = [f"Unknown ({team})" for team in teams[~known].tolist()]
+
+    columns = zip(
+        schedule_df['Match'].astype(int).tolist(), teams.tolist(), names.tolist(),
+        np.round(red_opr, 2).tolist(), np.round(blue_opr, 2).tolist(),
+        np.round(red_net, 2).tolist(), np.round(blue_net, 2).tolist(),
+        np.round(red_auto, 2).tolist(), np.round(blue_auto, 2).tolist(),
+        np.round(red_rs, 2).tolist(), np.round(blue_rs, 2).tolist(),
+        winner.tolist(), np.round(win_margin, 2).tolist()
+    )
+
+    return [
+        {
+            'Match': match,
+            'Red 1': r1,
+            'Red 1 Name': r1_name,
+            'Red 2': r2,
+            'Red 2 Name': r2_name,
+            'Blue 1': b1,
+            'Blue 1 Name': b1_name,
+            'Blue 2': b2,
+            'Blue 2 Name': b2_name,
+            'Red OPR': r_opr,
+            'Blue OPR': b_opr,
+            'Red NET': r_net,
+            'Blue NET': b_net,
+            'Red AUTO': r_auto,
+            'Blue AUTO': b_auto,
+            'Red RS': r_rs,
+            'Blue RS': b_rs,
+            'Winner': win,
+            'Win Margin': margin
+        }
+        for (match, (r1, r2, b1, b2), (r1_name, r2_name, b1_name, b2_name),
+             r_opr, b_opr, r_net, b_net, r_auto, b_auto, r_rs, b_rs, win, margin) in columns
+    ]
 
 
 def calculate_predicted_rankings_stochastic(schedule_df, teams_data):
@@ -630,9 +2137,10 @@ def calculate_predicted_rankings_stochastic(schedule_df, teams_data):
         'RP_Sum': 0, 'TBP1_Sum': 0, 'Auto_OPR_Sum': 0, 'Wins': 0, 'Losses': 0, 'Matches': 0
     } for team in teams_data['Team'].tolist()}
 
+    team_index = get_team_index(teams_data)
+
     def get_team_stats(team_num):
-        row = teams_data[teams_data['Team'] == team_num]
-        return row.iloc[0].to_dict() if not row.empty else None
+        return team_index.record(team_num)
 
     for _, row in schedule_df.iterrows():
         red_teams = [get_team_stats(int(row['Red 1'])), get_team_stats(int(row['Red 2']))]
@@ -708,33 +2216,194 @@ def calculate_predicted_rankings_stochastic(schedule_df, teams_data):
     return ranking_df.reset_index(drop=True)
 
 
-def convert_to_serializable(obj):
-    """Convertă numpy/pandas types la Python native types pentru JSON"""
-    import numpy as np
-    if isinstance(obj, dict):
-        return {k: convert_to_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_serializable(item) for item in obj]
-    elif isinstance(obj, (np.integer, np.int64, np.int32)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
+##############################
+# SIMULĂRI VECTORIZATE (NumPy)
+##############################
+
+def build_simulation_field(teams_data):
+    """
+    Extrage metricile echipelor ca array-uri contigue (în ordinea din teams_data),
+    folosite de motorul de simulare vectorizat. Rezultatul se păstrează în TeamIndex.
+    """
+    index = get_team_index(teams_data)
+    if index.simulation_field is not None:
+        return index.simulation_field
+
+    def column(name, fallback=None):
+        if name not in index.columns and fallback in index.columns:
+            name = fallback
+        if name not in index.columns:
+            return np.zeros(len(index))
+        return pd.to_numeric(pd.Series(index.columns[name]), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+    index.simulation_field = {
+        'teams': index.teams,
+        'position': index.rows,
+        # Ratele RP (goal, pattern, movement) - shape (echipe, 3)
+        'rp_rates': np.column_stack([
+            column('GoalRP_Rate', 'GoalRP'),
+            column('PatternRP_Rate', 'PatternRP'),
+            column('MovementRP_Rate', 'MovementRP'),
+        ]),
+        'opr': column('OPR_Season'),
+        'net': column('totalPointsNp'),
+    }
+    return index.simulation_field
+
+def get_simulation_pool():
+    """
+    Pool-ul de procese pentru simulări, creat la prima utilizare.
+    Workerii nu sunt creați prin fork din procesul Flask (thread-urile de fetch, refresh
+    sau joburi pot ține lock-uri în acel moment), ci din forkserver, care preîncarcă modulul
+    simulation; fără forkserver (Windows) se folosește spawn. Când serverul rulează ca
+    `python app.py`, fiecare worker re-importă și scriptul (ca __mp_main__): doar importurile
+    și definițiile, fără init_runtime().
+    """
+    global _simulation_pool
+    with _simulation_pool_lock:
+        if _simulation_pool is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['simulation'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _simulation_pool = ProcessPoolExecutor(max_workers=SIM_WORKERS, mp_context=context)
+        return _simulation_pool
+
+def iter_simulation_shards(field, n_sims, matches_per_team=6, seed=None, workers=None, shard_size=None,
+                           prefetch=None):
+    """
+    Generează rezultatele shard-urilor (de câte shard_size simulări, implicit SIM_SHARD_SIZE)
+    în ordine, pe măsură ce se termină. Fiecare shard primește un stream RNG independent
+    (SeedSequence.spawn), deci cu același seed rezultatul nu depinde de numărul de workeri.
+    Pe pool sunt cel mult prefetch (implicit 2 * workers) shard-uri în lucru; dacă generatorul
+    e închis (ex. clientul s-a deconectat), shard-urile încă nepornite sunt anulate - cele
+    deja preluate de un worker rulează până la capăt.
+    """
+    workers = SIM_WORKERS if workers is None else workers
+    shard_size = shard_size or SIM_SHARD_SIZE
+    prefetch = prefetch or 2 * workers
+    jobs = [
+        (min(shard_size, n_sims - start), shard_seed)
+        for start, shard_seed in zip(
+            range(0, n_sims, shard_size),
+            np.random.SeedSequence(seed).spawn(len(range(0, n_sims, shard_size)))
+        )
+    ]
+
+    pool = None
+    if workers > 1 and len(jobs) > 1:
+        try:
+            pool = get_simulation_pool()
+        except Exception as e:
+            print(f"⚠️ Pool-ul de simulări nu e disponibil ({e}), rulăm în procesul curent")
+
+    pending = deque()
+    next_job = 0
+    try:
+        while next_job < len(jobs) or pending:
+            try:
+                while pool is not None and next_job < len(jobs) and len(pending) < prefetch:
+                    size, shard_seed = jobs[next_job]
+                    pending.append((next_job, pool.submit(run_simulation_shard, field, size, matches_per_team, shard_seed)))
+                    next_job += 1
+                if pending:
+                    shard = pending[0][1].result()
+                    pending.popleft()
+                else:
+                    size, shard_seed = jobs[next_job]
+                    shard = run_simulation_shard(field, size, matches_per_team, shard_seed)
+                    next_job += 1
+            except Exception as e:
+                if pool is None:
+                    raise
+                # Reluăm în procesul curent de la primul shard neterminat
+                print(f"⚠️ Pool-ul de simulări a eșuat ({e}), rulăm în procesul curent")
+                pool = None
+                if pending:
+                    next_job = pending[0][0]
+                for _, future in pending:
+                    future.cancel()
+                pending.clear()
+                continue
+            yield shard
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+def run_simulation_batch(field, n_sims, matches_per_team=6, seed=None, workers=None):
+    """
+    Rulează n_sims simulări împărțite în shard-uri de SIM_SHARD_SIZE pe pool-ul de procese.
+    Cu același seed rezultatul este identic indiferent de numărul de workeri.
+    Returnează același format ca simulate_regionals_batch.
+    """
+    shards = list(iter_simulation_shards(field, n_sims, matches_per_team, seed, workers))
+    return {
+        'positions': np.concatenate([shard['positions'] for shard in shards]),
+        'wins': np.concatenate([shard['wins'] for shard in shards]),
+    }
+
+def summarize_simulation_positions(target_team, positions, wins, simulations=None):
+    """Statisticile raportate pentru o echipă, din pozițiile și victoriile ei pe fiecare simulare"""
+    positions = np.asarray(positions)
+    wins = np.asarray(wins)
+    return {
+        'team': int(target_team),
+        'simulations': int(simulations if simulations is not None else len(positions)),
+        'avg_position': float(round(positions.mean(), 2)),
+        'min_position': int(positions.min()),
+        'max_position': int(positions.max()),
+        'avg_wins': float(round(wins.mean(), 2)),
+        'position_distribution': {
+            'top_10': int((positions <= 10).sum()),
+            'top_20': int((positions <= 20).sum()),
+            'top_50': int((positions <= 50).sum()),
+        }
+    }
 
-def run_100_regional_simulations(teams_data, target_team, matches_per_team=6):
+def simulate_team_positions(teams_data, teams, matches_per_team=6, n_simulations=100, seed=None, engine=None):
     """
-    Rulează 100 simulări de regionale pentru o echipă țintă
+    Rulează n_simulations regionale și citește din FIECARE clasament pozițiile și victoriile
+    echipelor din `teams`. Returnează (positions, wins), array-uri (simulări, len(teams)),
+    sau None dacă simularea nu se poate rula.
+    engine: 'numpy' (vectorizat, implicit) sau 'legacy' (bucla cu DataFrame-uri)
+    """
+    engine = engine or SIMULATION_ENGINE
+    if engine == 'legacy':
+        return _simulate_team_positions_legacy(teams_data, teams, matches_per_team, n_simulations)
+
+    field = build_simulation_field(teams_data)
+    cols = [field['position'].get(int(team)) for team in teams]
+    if None in cols or n_simulations <= 0 or len(field['teams']) < 4:
+        return None
+
+    batch = run_simulation_batch(field, n_simulations, matches_per_team, seed)
+    return batch['positions'][:, cols], batch['wins'][:, cols]
+
+def run_100_regional_simulations(teams_data, target_team, matches_per_team=6,
+                                 n_simulations=100, seed=None, engine=None):
+    """
+    Rulează n_simulations (implicit 100) simulări de regionale pentru o echipă țintă
     Returnează statistici: poziție medie, win rate, etc.
     """
+    print(f"  🔄 Rulează {n_simulations} simulări pentru echipa {target_team}...")
+
+    result = simulate_team_positions(teams_data, [target_team], matches_per_team, n_simulations, seed, engine)
+    if result is None:
+        print(f"  ❌ Nu s-au putut finaliza simulări pentru echipa {target_team}")
+        return None
+
+    positions, wins = result
+    print(f"  ✅ {len(positions)}/{n_simulations} simulări complete")
+
+    return summarize_simulation_positions(target_team, positions[:, 0], wins[:, 0], n_simulations)
+
+def _simulate_team_positions_legacy(teams_data, teams, matches_per_team=6, n_simulations=100):
+    """Bucla originală: generate_ftc_schedule_pro + calculate_predicted_rankings_stochastic per simulare"""
     positions = []
     wins = []
     
-    print(f"  🔄 Rulează 100 simulări pentru echipa {target_team}...")
-    
-    for i in range(100):
+    for i in range(n_simulations):
         try:
             # Generează schedule aleator
             result = generate_ftc_schedule_pro(teams_data, matches_per_team)
@@ -755,68 +2424,77 @@ def run_100_regional_simulations(teams_data, target_team, matches_per_team=6):
                 print(f"    ⚠️ Simulare {i+1}: Ranking gol")
                 continue
             
-            # Găsește poziția echipei țintă
-            target_row = ranking_df[ranking_df['Echipa'] == target_team]
-            if not target_row.empty:
-                position = int(target_row.iloc[0]['Loc'])
-                team_wins = int(target_row.iloc[0]['Wins'])
-                positions.append(position)
-                wins.append(team_wins)
+            # Găsește pozițiile echipelor țintă în același clasament
+            target_rows = ranking_df.set_index('Echipa').reindex([int(team) for team in teams])
+            if target_rows['Loc'].notna().all():
+                positions.append(target_rows['Loc'].astype(int).tolist())
+                wins.append(target_rows['Wins'].astype(int).tolist())
         except Exception as e:
             print(f"    ❌ Simulare {i+1}: {e}")
             continue
         
         if (i + 1) % 25 == 0:
-            print(f"    ✓ {i+1}/100 simulări complete")
+            print(f"    ✓ {i+1}/{n_simulations} simulări complete")
     
     if not positions:
-        print(f"  ❌ Nu s-au putut finaliza simulări pentru echipa {target_team}")
         return None
     
-    print(f"  ✅ {len(positions)}/100 simulări complete")
-    
-    return {
-        'team': int(target_team),
-        'simulations': 100,
-        'avg_position': float(round(sum(positions) / len(positions), 2)),
-        'min_position': int(min(positions)),
-        'max_position': int(max(positions)),
-        'avg_wins': float(round(sum(wins) / len(wins), 2)),
-        'position_distribution': {
-            'top_10': int(len([p for p in positions if p <= 10])),
-            'top_20': int(len([p for p in positions if p <= 20])),
-            'top_50': int(len([p for p in positions if p <= 50])),
-        }
-    }
+    return np.array(positions), np.array(wins)
 
 
-def run_100_team_comparison(teams_data, team1, team2, matches_per_team=6):
+def run_100_team_comparison(teams_data, team1, team2, matches_per_team=6, n_simulations=100, seed=None):
     """
-    Rulează 100 simulări separatE pentru FIECARE echipă
-    Returnează statistici: comparație cu 100 simulări per echipă
+    Compară două echipe pe ACELAȘI set de n_simulations (implicit 100) regionale simulate
+    (common random numbers): din fiecare clasament citim pozițiile ambelor echipe, deci
+    zgomotul programului și al aruncărilor se anulează în diferența dintre ele.
+    Returnează statisticile fiecărei echipe plus statistici pereche (cine a terminat în față).
     """
-    print(f"  🔄 Rulează 100 simulări pentru echipa {team1}...")
-    team1_results = run_100_regional_simulations(teams_data, team1, matches_per_team)
-    
-    print(f"  🔄 Rulează 100 simulări pentru echipa {team2}...")
-    team2_results = run_100_team_comparison_helper(teams_data, team2, matches_per_team)
-    
-    if not team1_results or not team2_results:
+    print(f"  🔄 Rulează {n_simulations} simulări comune pentru {team1} vs {team2}...")
+
+    result = simulate_team_positions(teams_data, [team1, team2], matches_per_team, n_simulations, seed)
+    if result is None:
         return None
+
+    positions, wins = result
+    comparison = summarize_team_comparison(team1, team2, positions, wins, n_simulations)
+    print(f"  ✅ {len(positions)}/{n_simulations} simulări complete - {team1} în față în {comparison['team1_better']}")
+    return comparison
+
+def summarize_team_comparison(team1, team2, positions, wins, simulations=None):
+    """Statisticile comparației din pozițiile/victoriile pereche (simulări, 2) ale celor două echipe"""
+    positions = np.asarray(positions)
+    wins = np.asarray(wins)
+    team1_results = summarize_simulation_positions(team1, positions[:, 0], wins[:, 0], simulations)
+    team2_results = summarize_simulation_positions(team2, positions[:, 1], wins[:, 1], simulations)
     
     # Calculează cine a fost mai bun pe bază de poziție medie
     team1_better = 1 if team1_results['avg_position'] < team2_results['avg_position'] else 0
     team2_better = 1 if team2_results['avg_position'] < team1_results['avg_position'] else 0
-    
+
+    # Statistici pereche: în câte simulări a terminat fiecare echipă în fața celeilalte
+    samples = len(positions)
+    team1_ahead = int((positions[:, 0] < positions[:, 1]).sum())
+    team2_ahead = int((positions[:, 1] < positions[:, 0]).sum())
+    position_diff = (positions[:, 1] - positions[:, 0]).astype(np.float64)
+    diff_stderr = float(position_diff.std(ddof=1) / np.sqrt(samples)) if samples > 1 else 0.0
+
     return {
         'team1': int(team1),
         'team2': int(team2),
-        'team1_simulations': 100,
-        'team2_simulations': 100,
+        'team1_simulations': team1_results['simulations'],
+        'team2_simulations': team2_results['simulations'],
         'team1_avg_position': float(team1_results['avg_position']),
         'team2_avg_position': float(team2_results['avg_position']),
         'team1_better_overall': int(team1_better),
         'team2_better_overall': int(team2_better),
+        'team1_better': team1_ahead,
+        'team2_better': team2_ahead,
+        'team1_ahead_pct': round(100 * team1_ahead / samples, 1),
+        'avg_position_diff': round(float(position_diff.mean()), 2),
+        'position_diff_ci95': [
+            round(float(position_diff.mean() - 1.96 * diff_stderr), 2),
+            round(float(position_diff.mean() + 1.96 * diff_stderr), 2)
+        ],
         'team1_avg_wins': float(team1_results['avg_wins']),
         'team2_avg_wins': float(team2_results['avg_wins']),
         'team1_top_10': int(team1_results['position_distribution']['top_10']),
@@ -825,58 +2503,484 @@ def run_100_team_comparison(teams_data, team1, team2, matches_per_team=6):
         'team2_data': team2_results
     }
 
-def run_100_team_comparison_helper(teams_data, target_team, matches_per_team=6):
-    """Helper pentru run_100_team_comparison - rulează 100 simulări pentru o echipă"""
-    positions = []
-    wins = []
-    
-    for i in range(100):
+
+def iter_team_positions(teams_data, teams, matches_per_team=6, n_simulations=100, seed=None, chunk_size=None,
+                        prefetch=None):
+    """
+    Varianta incrementală a simulate_team_positions (motorul vectorizat): generează
+    (positions, wins) pentru echipele din `teams`, câte un chunk de simulări pe rând.
+    Cu același seed, rezultatul coincide cu varianta fără streaming doar dacă chunk_size == SIM_SHARD_SIZE.
+    """
+    field = build_simulation_field(teams_data)
+    cols = [field['position'][int(team)] for team in teams]
+    shards = iter_simulation_shards(
+        field, n_simulations, matches_per_team, seed, shard_size=chunk_size or SIM_STREAM_CHUNK, prefetch=prefetch
+    )
+    try:
+        for shard in shards:
+            yield shard['positions'][:, cols], shard['wins'][:, cols]
+    finally:
+        shards.close()
+
+def stream_simulation_progress(teams_data, teams, matches_per_team=6, n_simulations=100, seed=None,
+                               chunk_size=None, summarize=None):
+    """
+    Mesajele de progres ale unei simulări în streaming: după fiecare chunk, media locului,
+    victoriile medii și numărul de simulări de până acum pentru fiecare echipă;
+    la final, rezultatul complet calculat de summarize(positions, wins).
+    """
+    positions, wins = [], []
+    samples = 0
+    # Sume cumulate - fiecare mesaj costă O(chunk), nu O(simulări de până acum)
+    position_sum = np.zeros(len(teams))
+    wins_sum = np.zeros(len(teams))
+    top_10 = np.zeros(len(teams), dtype=np.int64)
+    ahead = np.zeros(2, dtype=np.int64)
+    for chunk_positions, chunk_wins in iter_team_positions(
+            teams_data, teams, matches_per_team, n_simulations, seed, chunk_size):
+        positions.append(chunk_positions)
+        wins.append(chunk_wins)
+        samples += len(chunk_positions)
+        position_sum += chunk_positions.sum(axis=0)
+        wins_sum += chunk_wins.sum(axis=0)
+        top_10 += (chunk_positions <= 10).sum(axis=0)
+        message = {
+            'type': 'progress',
+            'samples': samples,
+            'simulations': int(n_simulations),
+            'teams': [
+                {
+                    'team': int(team),
+                    'avg_position': round(float(position_sum[i] / samples), 2),
+                    'avg_wins': round(float(wins_sum[i] / samples), 2),
+                    'top_10': int(top_10[i]),
+                }
+                for i, team in enumerate(teams)
+            ]
+        }
+        if len(teams) == 2:
+            ahead += [
+                (chunk_positions[:, 0] < chunk_positions[:, 1]).sum(),
+                (chunk_positions[:, 1] < chunk_positions[:, 0]).sum()
+            ]
+            message['team1_better'] = int(ahead[0])
+            message['team2_better'] = int(ahead[1])
+        yield message
+
+    if samples:
+        yield {'type': 'result', 'results': summarize(np.concatenate(positions), np.concatenate(wins))}
+
+def streaming_response(messages):
+    """
+    Răspuns în streaming pentru un generator de mesaje: NDJSON implicit, sau Server-Sent Events
+    pentru ?format=sse / Accept: text/event-stream. Generatorul e închis la deconectarea clientului.
+    """
+    sse = (request.args.get('format') == 'sse'
+           or 'text/event-stream' in request.headers.get('Accept', ''))
+    shape = response_shape()
+
+    def frame(message_type, payload):
+        return b"event: " + message_type.encode('utf-8') + b"\ndata: " + payload + b"\n\n" if sse else payload + b"\n"
+
+    def encode():
         try:
-            result = generate_ftc_schedule_pro(teams_data, matches_per_team)
-            if result is None or not isinstance(result, tuple):
-                continue
-            
-            schedule_df, _ = result
-            
-            if schedule_df is None or len(schedule_df) == 0:
-                continue
-            
-            ranking_df = calculate_predicted_rankings_stochastic(schedule_df, teams_data)
-            
-            if ranking_df is None or len(ranking_df) == 0:
-                continue
-            
-            target_row = ranking_df[ranking_df['Echipa'] == target_team]
-            if not target_row.empty:
-                position = int(target_row.iloc[0]['Loc'])
-                team_wins = int(target_row.iloc[0]['Wins'])
-                positions.append(position)
-                wins.append(team_wins)
+            for message in messages:
+                yield frame(message['type'], encode_json(message, shape))
         except Exception as e:
-            continue
-    
-    if not positions:
+            print(f"Eroare streaming: {e}")
+            yield frame('error', encode_json({'type': 'error', 'error': str(e)}))
+        finally:
+            messages.close()
+
+    return Response(
+        encode(),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def wilson_half_width(successes, samples, z=1.96):
+    """Semi-lățimea intervalului Wilson pentru o proporție (nenulă și la p = 0 sau 1)"""
+    p = successes / samples
+    return z * np.sqrt(p * (1 - p) / samples + z * z / (4 * samples * samples)) / (1 + z * z / samples)
+
+def run_adaptive_simulation(teams_data, teams, matches_per_team=6, seed=None, summarize=None,
+                            tolerance=None, probability_tolerance=None, top_n=None,
+                            max_simulations=None, time_budget=None, batch_size=None):
+    """
+    Rulează simulări în batch-uri de batch_size până când, pentru fiecare echipă din `teams`,
+    intervalul de încredere 95% al locului mediu are semi-lățimea <= tolerance (locuri) și cel
+    al probabilității de top_n <= probability_tolerance, sau până se epuizează bugetul
+    (max_simulations / time_budget secunde). Returnează summarize(positions, wins) plus
+    'precision' - precizia atinsă și motivul opririi.
+    """
+    tolerance = SIM_ADAPTIVE_TOLERANCE if tolerance is None else tolerance
+    probability_tolerance = SIM_ADAPTIVE_PROB_TOLERANCE if probability_tolerance is None else probability_tolerance
+    top_n = top_n or SIM_ADAPTIVE_TOP_N
+    max_simulations = max_simulations or SIM_MAX_SIMULATIONS
+    time_budget = SIM_ADAPTIVE_TIME_BUDGET if time_budget is None else time_budget
+    batch_size = batch_size or SIM_ADAPTIVE_BATCH
+
+    started = time.perf_counter()
+    positions, wins = [], []
+    samples = 0
+    position_sum = np.zeros(len(teams))
+    position_sq_sum = np.zeros(len(teams))
+    top_n_count = np.zeros(len(teams))
+    stop_reason = 'max_simulations'
+
+    # Un singur batch rulează înaintea celui verificat: după convergență se pierde cel mult un
+    # shard (cele deja preluate de workeri nu mai pot fi anulate)
+    batches = iter_team_positions(teams_data, teams, matches_per_team, max_simulations, seed, batch_size, prefetch=2)
+    try:
+        for chunk_positions, chunk_wins in batches:
+            positions.append(chunk_positions)
+            wins.append(chunk_wins)
+            samples += len(chunk_positions)
+            position_sum += chunk_positions.sum(axis=0)
+            position_sq_sum += (chunk_positions.astype(np.float64) ** 2).sum(axis=0)
+            top_n_count += (chunk_positions <= top_n).sum(axis=0)
+
+            mean = position_sum / samples
+            variance = np.maximum(position_sq_sum / samples - mean ** 2, 0) * samples / max(samples - 1, 1)
+            position_ci = 1.96 * np.sqrt(variance / samples)
+            probability_ci = wilson_half_width(top_n_count, samples)
+
+            if samples >= SIM_ADAPTIVE_MIN and (position_ci <= tolerance).all() \
+                    and (probability_ci <= probability_tolerance).all():
+                stop_reason = 'converged'
+                break
+            if time.perf_counter() - started >= time_budget:
+                stop_reason = 'time_budget'
+                break
+    finally:
+        batches.close()
+
+    if not samples:
         return None
-    
-    return {
-        'team': int(target_team),
-        'simulations': len(positions),
-        'avg_position': float(round(sum(positions) / len(positions), 2)),
-        'min_position': int(min(positions)),
-        'max_position': int(max(positions)),
-        'avg_wins': float(round(sum(wins) / len(wins), 2)),
-        'position_distribution': {
-            'top_10': int(len([p for p in positions if p <= 10])),
-            'top_20': int(len([p for p in positions if p <= 20])),
-            'top_50': int(len([p for p in positions if p <= 50])),
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"  ✅ Adaptiv: {samples} simulări ({stop_reason}, {elapsed_ms:.0f} ms)")
+
+    results = summarize(np.concatenate(positions), np.concatenate(wins))
+    results['precision'] = {
+        'samples': int(samples),
+        'stop_reason': stop_reason,
+        'converged': stop_reason == 'converged',
+        'elapsed_ms': round(elapsed_ms, 1),
+        'tolerance': tolerance,
+        'probability_tolerance': probability_tolerance,
+        'top_n': int(top_n),
+        'teams': [
+            {
+                'team': int(team),
+                'avg_position': round(float(mean[i]), 2),
+                'avg_position_ci95': round(float(position_ci[i]), 3),
+                f'top_{top_n}_probability': round(float(top_n_count[i] / samples), 4),
+                f'top_{top_n}_ci95': round(float(probability_ci[i]), 4),
+            }
+            for i, team in enumerate(teams)
+        ]
+    }
+    return results
+
+class SimulationParamsError(ValueError):
+    """Parametri de simulare invalizi în body - endpoint-urile răspund cu 400"""
+
+def get_chunk_size(payload, n_simulations):
+    """Mărimea unui chunk de streaming din body (implicit SIM_STREAM_CHUNK), limitată la 1..n_simulations"""
+    try:
+        chunk_size = int(payload.get('chunk_size') or SIM_STREAM_CHUNK)
+    except (TypeError, ValueError):
+        raise SimulationParamsError("chunk_size must be an integer")
+    return max(1, min(chunk_size, n_simulations))
+
+def get_adaptive_params(payload):
+    """
+    Parametrii modului adaptiv din body ("simulations": "auto" sau "adaptive": true),
+    sau None dacă se cere un număr fix de simulări.
+    """
+    if not (payload.get('adaptive') is True or payload.get('simulations') == 'auto'):
+        return None
+
+    def number(name, cast):
+        value = payload.get(name)
+        return cast(value) if value is not None else None
+
+    try:
+        max_simulations = number('max_simulations', int)
+        return {
+            'seed': number('seed', int),
+            'tolerance': number('tolerance', float),
+            'probability_tolerance': number('probability_tolerance', float),
+            'top_n': number('top_n', int),
+            'max_simulations': max(1, min(max_simulations, SIM_MAX_SIMULATIONS)) if max_simulations else None,
+            'time_budget': number('time_budget', float),
         }
+    except (TypeError, ValueError):
+        raise SimulationParamsError("Invalid adaptive simulation parameters")
+
+##############################
+# JOBURI DE SIMULARE (asincron)
+##############################
+
+JOB_ACTIVE_STATES = ('queued', 'running')
+
+def job_cache_key(job_id):
+    return f"job_{job_id}"
+
+def job_status(job):
+    """Starea publică a unui job (fără rezultat)"""
+    return {key: job[key] for key in (
+        'job_id', 'kind', 'event', 'season', 'status', 'progress',
+        'error', 'created_at', 'started_at', 'finished_at'
+    )}
+
+def get_job(job_id):
+    """Jobul din memorie, sau starea finală persistată în cache (alt proces / după restart)"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    cached = get_cache(job_cache_key(job_id))
+    return cached['data'] if cached else None
+
+def prune_jobs():
+    """Scoate din memorie joburile terminate mai vechi de SIM_JOB_TTL (rămân în cache)"""
+    cutoff = (datetime.now() - timedelta(seconds=SIM_JOB_TTL)).isoformat()
+    with _jobs_lock:
+        for job_id, job in list(_jobs.items()):
+            if job['status'] not in JOB_ACTIVE_STATES and (job['finished_at'] or '') < cutoff:
+                del _jobs[job_id]
+
+def submit_simulation_job(kind, event_code, season, client, teams_data, teams,
+                          n_simulations, seed, memo_key, summarize, envelope):
+    """
+    Pune în coadă o simulare. Returnează (job, None) sau (None, mesaj de eroare) dacă
+    coada (SIM_JOB_QUEUE_DEPTH) sau limita per client (SIM_JOB_MAX_PER_CLIENT) e plină.
+    """
+    prune_jobs()
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'kind': kind,
+        'event': event_code,
+        'season': season,
+        'client': client,
+        'status': 'queued',
+        'progress': {'samples': 0, 'simulations': int(n_simulations)},
+        'error': None,
+        'result': None,
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'cancel': threading.Event(),
+        'future': None,
     }
 
+    with _jobs_lock:
+        active = [j for j in _jobs.values() if j['status'] in JOB_ACTIVE_STATES]
+        if len(active) >= SIM_JOB_QUEUE_DEPTH:
+            return None, "Simulation queue is full"
+        if sum(1 for j in active if j['client'] == client) >= SIM_JOB_MAX_PER_CLIENT:
+            return None, "Too many simulation jobs for this client"
+        _jobs[job['job_id']] = job
+        job['future'] = _job_executor.submit(
+            run_simulation_job, job, teams_data, teams, n_simulations, seed, memo_key, summarize, envelope
+        )
+
+    print(f"📥 Job {job['job_id']} ({kind}, {event_code}) pus în coadă")
+    return job, None
+
+def run_simulation_job(job, teams_data, teams, n_simulations, seed, memo_key, summarize, envelope):
+    """
+    Rulează simularea unui job pe un thread din _job_executor, shard cu shard
+    (chunk-uri de SIM_SHARD_SIZE, deci același rezultat ca endpoint-ul sincron),
+    actualizând progresul și verificând anularea între shard-uri.
+    Rezultatul e partajat cu endpoint-ul sincron prin memo_key.
+    """
+    if job['cancel'].is_set():
+        return finish_job(job, 'cancelled')
+    job['status'] = 'running'
+    job['started_at'] = datetime.now().isoformat()
+
+    memoized = get_simulation_memo(memo_key)
+    if memoized is not None:
+        job['progress'] = {'samples': int(n_simulations), 'simulations': int(n_simulations)}
+        return finish_job(job, 'done', result=dict(envelope, results=memoized))
+
+    messages = stream_simulation_progress(
+        teams_data, teams, 6, n_simulations, seed, SIM_SHARD_SIZE, summarize
+    )
+    try:
+        for message in messages:
+            if job['cancel'].is_set():
+                return finish_job(job, 'cancelled')
+            if message['type'] == 'progress':
+                job['progress'] = {'samples': message['samples'], 'simulations': message['simulations']}
+            else:
+                set_simulation_memo(memo_key, message['results'])
+                return finish_job(job, 'done', result=dict(envelope, results=message['results']))
+        return finish_job(job, 'failed', error="Simulation failed")
+    except Exception as e:
+        print(f"❌ Job {job['job_id']}: {e}")
+        return finish_job(job, 'failed', error=str(e))
+    finally:
+        messages.close()
+
+def finish_job(job, status, result=None, error=None):
+    """Starea finală a jobului, persistată în cache pentru SIM_JOB_TTL"""
+    job['status'] = status
+    job['result'] = result
+    job['error'] = error
+    job['finished_at'] = datetime.now().isoformat()
+    print(f"📤 Job {job['job_id']}: {status}")
+    set_cache(job_cache_key(job['job_id']), dict(job_status(job), result=result), ttl=SIM_JOB_TTL, force=True)
+
+def cancel_job(job_id):
+    """Anulează un job: din coadă imediat, iar unul pornit la următorul shard"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None or job['status'] not in JOB_ACTIVE_STATES:
+        return job
+    job['cancel'].set()
+    if job['future'].cancel():
+        finish_job(job, 'cancelled')
+    return job
+
+def wants_async_job():
+    """Clientul a cerut rulare ca job (?async=1 sau "async": true în body)"""
+    payload = request.get_json(silent=True) or {}
+    return request.args.get('async', '').lower() in ('1', 'true') or payload.get('async') is True
+
+def job_accepted_response(job, error):
+    """202 cu ID-ul jobului, sau 429 dacă coada e plină"""
+    if job is None:
+        return jsonify({"error": error}), 429, {'Retry-After': '5'}
+    return jsonify({
+        "success": True,
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "result_url": f"/api/jobs/{job['job_id']}/result"
+    }), 202
+
+def summarize_field_distribution(teams, positions, wins, names=None):
+    """
+    Distribuția locurilor pentru TOATE echipele, calculată într-o singură trecere
+    peste matricele (simulări, echipe). Returnează lista sortată după locul mediu.
+    """
+    positions = np.asarray(positions)
+    wins = np.asarray(wins)
+    mean_position = positions.mean(axis=0)
+    percentiles = np.percentile(positions, FIELD_PERCENTILES, axis=0)
+    top_n = {n: (positions <= n).mean(axis=0) for n in FIELD_TOP_N}
+    avg_wins = wins.mean(axis=0)
+
+    field = []
+    for i in np.argsort(mean_position, kind='stable'):
+        field.append({
+            'team': int(teams[i]),
+            'name': names[i] if names is not None else None,
+            'avg_position': round(float(mean_position[i]), 2),
+            'min_position': int(positions[:, i].min()),
+            'max_position': int(positions[:, i].max()),
+            'avg_wins': round(float(avg_wins[i]), 2),
+            'percentiles': {
+                f'p{p}': float(percentiles[k, i]) for k, p in enumerate(FIELD_PERCENTILES)
+            },
+            'top_n_probability': {
+                f'top_{n}': round(float(top_n[n][i]), 4) for n in FIELD_TOP_N
+            }
+        })
+    return field
+
+def run_field_simulation(teams_data, matches_per_team=6, n_simulations=100, seed=None, engine=None):
+    """
+    Un singur batch de simulări din care se citește clasamentul întregului teren
+    (în loc de câte un /api/simulate-team per echipă).
+    """
+    index = get_team_index(teams_data)
+    print(f"  🔄 Rulează {n_simulations} simulări pentru tot terenul ({len(index)} echipe)...")
+
+    result = simulate_team_positions(teams_data, index.teams, matches_per_team, n_simulations, seed, engine)
+    if result is None:
+        return None
+
+    positions, wins = result
+    print(f"  ✅ {len(positions)}/{n_simulations} simulări complete")
+    return {
+        'simulations': int(len(positions)),
+        'matches_per_team': int(matches_per_team),
+        'teams_count': len(index),
+        'field': summarize_field_distribution(index.teams, positions, wins, index.columns.get('Name'))
+    }
+
+def report_data_hash(teams_data):
+    """Hash-ul conținutului raportului (memorat în TeamIndex, calculat o dată per DataFrame)"""
+    index = get_team_index(teams_data)
+    if index.data_hash is None:
+        payload = json.dumps(teams_data.to_dict(orient='records'), sort_keys=True, default=str)
+        index.data_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return index.data_hash
+
+def simulation_memo_key(kind, event_code, season, teams, n_simulations, matches_per_team, seed, teams_data):
+    """
+    Cheia de cache a unui rezultat de simulare. Include hash-ul datelor raportului, deci
+    un raport reconstruit cu alte date nu mai poate servi rezultate vechi.
+    """
+    teams_part = '-'.join(str(int(team)) for team in teams) or 'all'
+    return (f"sim_{event_code}_{season}_{kind}_{teams_part}_{n_simulations}_{matches_per_team}_"
+            f"{seed}_{SIMULATION_ENGINE}_{report_data_hash(teams_data)[:16]}")
+
+def get_simulation_memo(memo_key):
+    """Rezultatul memorat al unei simulări, sau None"""
+    cached = get_cache(memo_key)
+    return cached['data'] if cached else None
+
+def set_simulation_memo(memo_key, results):
+    """Memorează rezultatul (deja serializabil) al unei simulări, cât timp trăiește și raportul"""
+    set_cache(memo_key, results, ttl=CACHE_HARD_EXPIRY)
+
+def invalidate_simulation_memos(event_code, season=2025):
+    """Șterge rezultatele de simulare memorate pentru un eveniment (la reconstruirea raportului)"""
+    prefix = f"sim_{event_code}_{season}_"
+    keys = [key for key in set(cache_index) | set(cache) if key.startswith(prefix)]
+    for key in keys:
+        cache.pop(key, None)
+        cache_index.pop(key, None)
+        try:
+            cache_backend.delete(key)
+        except Exception as e:
+            print(f"⚠️ Eroare la ștergerea {key}: {e}")
+    if keys:
+        print(f"🧹 Șterse {len(keys)} simulări memorate pentru {event_code}_{season}")
+
+def get_simulation_params(payload):
+    """Citește din body-ul JSON numărul de simulări (limitat la SIM_MAX_SIMULATIONS) și seed-ul"""
+    try:
+        n_simulations = int(payload.get('simulations', 100))
+        seed = payload.get('seed')
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        raise SimulationParamsError("simulations and seed must be integers")
+    n_simulations = max(1, min(n_simulations, SIM_MAX_SIMULATIONS))
+    return n_simulations, seed
+
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Endpoint de verificare status"""
-    return jsonify({"status": "ok", "message": "Server is running"}), 200
+    return jsonify({
+        "status": "ok",
+        "message": "Server is running",
+        "cache_entries": len(cache_index),
+        "cache_startup_ms": round(CACHE_STARTUP_MS, 1),
+        "upstream_rate": round(upstream_limiter.rate, 2)
+    }), 200
+
+@app.route('/api/upstream', methods=['GET'])
+def upstream_status():
+    """Starea limitatorului de cereri către ftcscout (rata curentă, erori, așteptare)"""
+    return jsonify(dict(upstream_limiter.stats(), success=True)), 200
 
 @app.route('/api/event/<event_code>', methods=['GET'])
 def get_event_data(event_code):
@@ -891,47 +2995,95 @@ def get_event_data(event_code):
         if report_df is None:
             return jsonify({"error": event_name}), 400
         
-        # Convertim DataFrame în JSON
-        data = report_df.to_dict(orient='records')
+        # ETag-ul urmează versiunea raportului din cache; revalidarea nu serializează nimic
+        version, updated_at = report_entry_version(f"{event_code}_{season}", report_df) or (None, None)
+        validators = http_validators(['event', event_code, season, version, response_shape()], [updated_at])
+        not_modified = not_modified_response(validators)
+        if not_modified is not None:
+            return not_modified
         
-        return jsonify({
+        # DataFrame-ul e codat direct de encode_json (records sau ?shape=columns)
+        return with_http_cache(jsonify({
             "success": True,
             "event": event_code,
             "event_name": event_name,
             "season": season,
-            "teams_count": len(data),
-            "data": data
-        }), 200
+            "teams_count": len(report_df),
+            "failed_teams": report_df.attrs.get('failed_teams', []),
+            "data": report_df
+        }), validators), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/events', methods=['POST'])
 def analyze_multiple_events():
-    """Endpoint pentru a analiza multiple evenimente"""
+    """
+    Endpoint pentru a analiza multiple evenimente (body: event_codes, season).
+    Evenimentele sunt preluate în paralel și trimise ca NDJSON, câte o linie per eveniment
+    pe măsură ce e gata ({"type": "event"} sau {"type": "error"}), apoi {"type": "done"}.
+    """
     try:
         event_codes = request.json.get('event_codes', [])
         season = request.json.get('season', 2025)
-        
-        results = {}
-        for event_code in event_codes:
-            report_df, event_name = get_event_season_report(event_code, season)
-            if report_df is not None:
-                results[event_code] = {
-                    "event_name": event_name,
-                    "data": report_df.to_dict(orient='records')
-                }
-        
-        return jsonify({"success": True, "results": results}), 200
+
+        def messages():
+            reports = iter_event_season_reports(event_codes, season)
+            done = 0
+            try:
+                for event_code, report_df, event_name in reports:
+                    if report_df is None:
+                        yield {"type": "error", "event": event_code, "error": event_name}
+                        continue
+                    done += 1
+                    yield {
+                        "type": "event",
+                        "event": event_code,
+                        "event_name": event_name,
+                        "teams_count": len(report_df),
+                        "failed_teams": report_df.attrs.get('failed_teams', []),
+                        "data": report_df
+                    }
+            finally:
+                reports.close()
+            yield {"type": "done", "events": done, "requested": len(event_codes)}
+
+        return streaming_response(messages())
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 def fetch_event_matches(event_code, season=2025):
-    """Fetch-ează meciurile Quals ale unui eveniment din API GraphQL"""
+    """
+    Meciurile Quals ale unui eveniment, din cache sau din API GraphQL.
+    Lista e păstrată MATCHES_CACHE_LIVE_TTL cât timp evenimentul nu s-a terminat
+    și MATCHES_CACHE_FINISHED_TTL după aceea.
+    """
+    cache_key = f"matches_{event_code}_{season}"
+    cached = get_cache(cache_key)
+    if cached:
+        return cached['data']['matches']
+
+    def load_or_fetch():
+        cached = get_cache(cache_key)
+        if cached:
+            return cached['data']['matches']
+        result = _fetch_event_matches(event_code, season)
+        if result is None:
+            return None
+        quals_matches, finished = result
+        ttl = MATCHES_CACHE_FINISHED_TTL if finished else MATCHES_CACHE_LIVE_TTL
+        set_cache(cache_key, {'matches': quals_matches, 'finished': finished}, ttl=ttl, force=True)
+        return quals_matches
+
+    return single_flight(cache_key, load_or_fetch)
+
+def _fetch_event_matches(event_code, season=2025):
+    """Fetch-ează meciurile Quals ale unui eveniment din API GraphQL: (quals_matches, finished)"""
     query = gql("""
     query ExampleQuery($season: Int!, $code: String!) {
       eventByCode(season: $season, code: $code) {
+        finished
         matches {
           matchNum
           tournamentLevel
@@ -945,28 +3097,28 @@ def fetch_event_matches(event_code, season=2025):
     """)
     
     try:
-        result = client.execute(
+        result = get_gql_client().execute(
             query,
             variable_values={"season": season, "code": event_code}
         )
-        all_matches = result.get('eventByCode', {}).get('matches', [])
+        event = result.get('eventByCode') or {}
+        all_matches = event.get('matches', [])
         
         # Filtrează doar meciurile din Quals
         quals_matches = [m for m in all_matches if m.get('tournamentLevel', '').lower() == 'quals']
         
         print(f"📥 Meciuri găsite: {len(all_matches)} totale, {len(quals_matches)} Quals")
         
-        return quals_matches
+        return quals_matches, bool(event.get('finished'))
     except Exception as e:
         print(f"❌ Eroare la fetch meciuri: {e}")
         return None
 
 def convert_real_matches_to_schedule(matches):
-    """Convertește lista de meciuri din API în format schedule DataFrame"""
-    schedule_data = []
+    """Convertește lista de meciuri din API în format schedule DataFrame (construit pe coloane)"""
+    columns = {'Match': [], 'Red 1': [], 'Red 2': [], 'Blue 1': [], 'Blue 2': []}
     
     for match in matches:
-        match_num = match.get('matchNum', 0)
         teams = match.get('teams', [])
         
         # Separăm echipele roșii și albastre
@@ -974,19 +3126,17 @@ def convert_real_matches_to_schedule(matches):
         blue_teams = [t['teamNumber'] for t in teams if t.get('alliance', '').lower() == 'blue']
         
         if len(red_teams) >= 2 and len(blue_teams) >= 2:
-            schedule_data.append({
-                'Match': match_num,
-                'Red 1': red_teams[0],
-                'Red 2': red_teams[1],
-                'Blue 1': blue_teams[0],
-                'Blue 2': blue_teams[1]
-            })
+            columns['Match'].append(match.get('matchNum', 0))
+            columns['Red 1'].append(red_teams[0])
+            columns['Red 2'].append(red_teams[1])
+            columns['Blue 1'].append(blue_teams[0])
+            columns['Blue 2'].append(blue_teams[1])
     
-    return pd.DataFrame(schedule_data)
+    return pd.DataFrame(columns)
 
 @app.route('/api/generate-schedule/<event_code>', methods=['GET'])
 def generate_schedule(event_code):
-    """Generează program FTC pentru un eveniment"""
+    """Generează program FTC pentru un eveniment (query: season, matches_per_team, seed)"""
     try:
         season = request.args.get('season', 2025, type=int)
         matches_per_team = request.args.get('matches_per_team', 6, type=int)
@@ -997,23 +3147,36 @@ def generate_schedule(event_code):
         if report_df is None:
             return jsonify({"error": "Event not found"}), 404
         
+        # Doar programele cu seed sunt deterministe (și deci revalidabile)
+        seed = request.args.get('seed', None, type=int)
+        version, updated_at = report_entry_version(f"{event_code}_{season}", report_df) or (None, None)
+        validators = http_validators(
+            ['generate-schedule', event_code, season, version, matches_per_team, seed, response_shape()],
+            [updated_at]
+        )
+        not_modified = not_modified_response(validators)
+        if not_modified is not None:
+            return not_modified
+        
         # Generează schedule-ul
-        schedule_df, duplicates = generate_ftc_schedule_pro(report_df, matches_per_team)
+        schedule_df, duplicates, quality = generate_ftc_schedule_heap(report_df, matches_per_team, seed=seed)
         
         if len(schedule_df) == 0:
             return jsonify({"error": "Nu s-au putut genera meciuri"}), 400
         
-        print(f"📊 Program generat: {len(schedule_df)} meciuri, {duplicates} alianțe duplicate")
+        print(f"📊 Program generat: {len(schedule_df)} meciuri, {duplicates} alianțe duplicate, "
+              f"{quality['duplicate_opponents']} adversari repetați, pauză minimă {quality['min_gap']}")
         
-        return jsonify({
+        return with_http_cache(jsonify({
             "success": True,
             "event": event_code,
             "event_name": event_name,
             "season": season,
             "matches_count": len(schedule_df),
             "duplicate_alliances": duplicates,
-            "schedule": schedule_df.to_dict(orient='records')
-        }), 200
+            "quality": quality,
+            "schedule": schedule_df
+        }), validators), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1024,33 +3187,49 @@ def import_schedule(event_code):
     try:
         season = request.args.get('season', 2025, type=int)
         
-        # Fetch-ează meciurile din API
-        matches = fetch_event_matches(event_code, season)
+        # Meciurile și raportul (pentru event name) se preiau în paralel
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            matches_future = executor.submit(fetch_event_matches, event_code, season)
+            report_future = executor.submit(get_event_season_report, event_code, season)
+            matches = matches_future.result()
+            report_df, event_name = report_future.result()
         
         if not matches:
             return jsonify({"error": "No matches found for this event"}), 404
         
+        # ETag-ul combină versiunea listei de meciuri și a raportului (pentru event name)
+        matches_version, matches_updated = cache_entry_version(
+            f"matches_{event_code}_{season}", matches, lambda data: data.get('data', {}).get('matches')
+        ) or (None, None)
+        report_version, report_updated = ('none', None)
+        if report_df is not None:
+            report_version, report_updated = report_entry_version(f"{event_code}_{season}", report_df) or (None, None)
+        validators = http_validators(
+            ['import-schedule', event_code, season, matches_version, report_version, response_shape()],
+            [matches_updated, report_updated]
+        )
+        not_modified = not_modified_response(validators)
+        if not_modified is not None:
+            return not_modified
+        
         # Convertește meciurile în format schedule
         schedule_df = convert_real_matches_to_schedule(matches)
         
         if len(schedule_df) == 0:
             return jsonify({"error": "Nu s-au putut procesa meciurile"}), 400
         
-        # Preluă și event name-ul
-        report_df, event_name = get_event_season_report(event_code, season)
-        
         print(f"📥 Program importat: {len(schedule_df)} meciuri din evenimentul real")
         
-        return jsonify({
+        return with_http_cache(jsonify({
             "success": True,
             "event": event_code,
             "event_name": event_name if report_df is not None else f"Event {event_code}",
             "season": season,
             "matches_count": len(schedule_df),
             "duplicate_alliances": 0,
-            "schedule": schedule_df.to_dict(orient='records'),
+            "schedule": schedule_df,
             "is_real": True
-        }), 200
+        }), validators), 200
     
     except Exception as e:
         print(f"Eroare import: {e}")
@@ -1089,7 +3268,7 @@ def predict_schedule(event_code):
             "event_name": event_name,
             "season": season,
             "predictions_count": len(predictions),
-            "predictions": predictions
+            "predictions": pd.DataFrame(predictions) if response_shape() == 'columns' else predictions
         }), 200
     
     except Exception as e:
@@ -1129,7 +3308,7 @@ def calculate_ranking(event_code):
             "event_name": event_name,
             "season": season,
             "teams_count": len(ranking_df),
-            "ranking": ranking_df.to_dict(orient='records')
+            "ranking": ranking_df
         }), 200
     
     except Exception as e:
@@ -1138,7 +3317,11 @@ def calculate_ranking(event_code):
 
 @app.route('/api/simulate-team/<event_code>', methods=['POST'])
 def simulate_team(event_code):
-    """Simulează 100 regionale pentru o echipă selectată"""
+    """
+    Simulează regionale pentru o echipă selectată (body: team_number, simulations=100, seed).
+    Cu "simulations": "auto" rulează adaptiv (tolerance, probability_tolerance, top_n,
+    max_simulations, time_budget) și raportează precizia atinsă.
+    """
     try:
         season = request.args.get('season', 2025, type=int)
         team_number = request.json.get('team_number', None)
@@ -1153,19 +3336,59 @@ def simulate_team(event_code):
             return jsonify({"error": "Event not found"}), 404
         
         # Verifică dacă echipa există în date
-        if int(team_number) not in report_df['Team'].values:
+        if int(team_number) not in get_team_index(report_df):
             return jsonify({"error": "Team not found in event"}), 404
         
-        print(f"🎯 Incepe simulare 100 regionale pentru echipa {team_number}...")
-        
-        # Rulează simulări
-        sim_results = run_100_regional_simulations(report_df, int(team_number), matches_per_team=6)
-        
-        if not sim_results:
-            return jsonify({"error": "Simulation failed"}), 500
-        
-        # Convertește tipuri numpy/pandas la Python native types
-        sim_results = convert_to_serializable(sim_results)
+        adaptive = get_adaptive_params(request.json)
+        if adaptive is not None:
+            team_number = int(team_number)
+            print(f"🎯 Incepe simulare adaptivă pentru echipa {team_number}...")
+            sim_results = run_adaptive_simulation(
+                report_df, [team_number], 6,
+                summarize=lambda positions, wins: summarize_simulation_positions(
+                    team_number, positions[:, 0], wins[:, 0]
+                ),
+                **adaptive
+            )
+            if not sim_results:
+                return jsonify({"error": "Simulation failed"}), 500
+            return jsonify({
+                "success": True,
+                "event": event_code,
+                "event_name": event_name,
+                "season": season,
+                "simulation_type": "single_team",
+                "results": sim_results
+            }), 200
+
+        n_simulations, seed = get_simulation_params(request.json)
+        memo_key = simulation_memo_key('team', event_code, season, [team_number], n_simulations, 6, seed, report_df)
+
+        if wants_async_job():
+            team_number = int(team_number)
+            return job_accepted_response(*submit_simulation_job(
+                'single_team', event_code, season, request.remote_addr, report_df, [team_number],
+                n_simulations, seed, memo_key,
+                summarize=lambda positions, wins: summarize_simulation_positions(
+                    team_number, positions[:, 0], wins[:, 0], n_simulations
+                ),
+                envelope={"success": True, "event": event_code, "event_name": event_name,
+                          "season": season, "simulation_type": "single_team"}
+            ))
+
+        sim_results = get_simulation_memo(memo_key)
+        if sim_results is None:
+            print(f"🎯 Incepe simulare {n_simulations} regionale pentru echipa {team_number}...")
+
+            # Rulează simulări
+            sim_results = run_100_regional_simulations(
+                report_df, int(team_number), matches_per_team=6, n_simulations=n_simulations, seed=seed
+            )
+
+            if not sim_results:
+                return jsonify({"error": "Simulation failed"}), 500
+
+            set_simulation_memo(memo_key, sim_results)
         
         return jsonify({
             "success": True,
@@ -1176,13 +3399,18 @@ def simulate_team(event_code):
             "results": sim_results
         }), 200
     
+    except SimulationParamsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Eroare simulare: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/compare-teams/<event_code>', methods=['POST'])
 def compare_teams(event_code):
-    """Compară două echipe în 100 simulări de regionale"""
+    """
+    Compară două echipe în simulări de regionale (body: team1, team2, simulations=100, seed).
+    Cu "simulations": "auto" rulează adaptiv, ca /api/simulate-team.
+    """
     try:
         season = request.args.get('season', 2025, type=int)
         team1 = request.json.get('team1', None)
@@ -1201,21 +3429,59 @@ def compare_teams(event_code):
             return jsonify({"error": "Event not found"}), 404
         
         # Verifică dacă ambele echipe există
-        if int(team1) not in report_df['Team'].values:
+        if int(team1) not in get_team_index(report_df):
             return jsonify({"error": f"Team {team1} not found in event"}), 404
-        if int(team2) not in report_df['Team'].values:
+        if int(team2) not in get_team_index(report_df):
             return jsonify({"error": f"Team {team2} not found in event"}), 404
         
-        print(f"⚔️ Incepe comparare 100 regionale: {team1} vs {team2}...")
-        
-        # Rulează comparație
-        comp_results = run_100_team_comparison(report_df, int(team1), int(team2), matches_per_team=6)
-        
-        if not comp_results:
-            return jsonify({"error": "Comparison failed"}), 500
-        
-        # Convertește tipuri numpy/pandas la Python native types
-        comp_results = convert_to_serializable(comp_results)
+        adaptive = get_adaptive_params(request.json)
+        if adaptive is not None:
+            team1, team2 = int(team1), int(team2)
+            print(f"⚔️ Incepe comparare adaptivă: {team1} vs {team2}...")
+            comp_results = run_adaptive_simulation(
+                report_df, [team1, team2], 6,
+                summarize=lambda positions, wins: summarize_team_comparison(team1, team2, positions, wins),
+                **adaptive
+            )
+            if not comp_results:
+                return jsonify({"error": "Comparison failed"}), 500
+            return jsonify({
+                "success": True,
+                "event": event_code,
+                "event_name": event_name,
+                "season": season,
+                "simulation_type": "comparison",
+                "results": comp_results
+            }), 200
+
+        n_simulations, seed = get_simulation_params(request.json)
+        memo_key = simulation_memo_key('compare', event_code, season, [team1, team2], n_simulations, 6, seed, report_df)
+
+        if wants_async_job():
+            team1, team2 = int(team1), int(team2)
+            return job_accepted_response(*submit_simulation_job(
+                'comparison', event_code, season, request.remote_addr, report_df, [team1, team2],
+                n_simulations, seed, memo_key,
+                summarize=lambda positions, wins: summarize_team_comparison(
+                    team1, team2, positions, wins, n_simulations
+                ),
+                envelope={"success": True, "event": event_code, "event_name": event_name,
+                          "season": season, "simulation_type": "comparison"}
+            ))
+
+        comp_results = get_simulation_memo(memo_key)
+        if comp_results is None:
+            print(f"⚔️ Incepe comparare {n_simulations} regionale: {team1} vs {team2}...")
+
+            # Rulează comparație
+            comp_results = run_100_team_comparison(
+                report_df, int(team1), int(team2), matches_per_team=6, n_simulations=n_simulations, seed=seed
+            )
+
+            if not comp_results:
+                return jsonify({"error": "Comparison failed"}), 500
+
+            set_simulation_memo(memo_key, comp_results)
         
         return jsonify({
             "success": True,
@@ -1226,10 +3492,188 @@ def compare_teams(event_code):
             "results": comp_results
         }), 200
     
+    except SimulationParamsError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Eroare comparare: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/simulate-team/<event_code>/stream', methods=['POST'])
+def simulate_team_stream(event_code):
+    """
+    Ca /api/simulate-team, dar trimite rezultate incrementale (NDJSON sau SSE) după fiecare
+    chunk de simulări (body: team_number, simulations=100, seed, chunk_size=SIM_STREAM_CHUNK)
+    """
+    try:
+        season = request.args.get('season', 2025, type=int)
+        team_number = request.json.get('team_number', None)
+
+        if not team_number:
+            return jsonify({"error": "Team number required"}), 400
+
+        # Preluă datele evenimentului
+        report_df, event_name = get_event_season_report(event_code, season)
+
+        if report_df is None:
+            return jsonify({"error": "Event not found"}), 404
+
+        if int(team_number) not in get_team_index(report_df):
+            return jsonify({"error": "Team not found in event"}), 404
+        if len(report_df) < 4:
+            return jsonify({"error": "Simulation failed"}), 500
+
+        n_simulations, seed = get_simulation_params(request.json)
+        chunk_size = get_chunk_size(request.json, n_simulations)
+        print(f"🎯 Incepe simulare (stream) {n_simulations} regionale pentru echipa {team_number}...")
+
+        team_number = int(team_number)
+        return streaming_response(stream_simulation_progress(
+            report_df, [team_number], 6, n_simulations, seed, chunk_size,
+            summarize=lambda positions, wins: summarize_simulation_positions(
+                team_number, positions[:, 0], wins[:, 0], n_simulations
+            )
+        ))
+
+    except SimulationParamsError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Eroare simulare: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/compare-teams/<event_code>/stream', methods=['POST'])
+def compare_teams_stream(event_code):
+    """
+    Ca /api/compare-teams, dar trimite rezultate incrementale (NDJSON sau SSE) după fiecare
+    chunk de simulări (body: team1, team2, simulations=100, seed, chunk_size=SIM_STREAM_CHUNK)
+    """
+    try:
+        season = request.args.get('season', 2025, type=int)
+        team1 = request.json.get('team1', None)
+        team2 = request.json.get('team2', None)
+
+        if not team1 or not team2:
+            return jsonify({"error": "Both team numbers required"}), 400
+
+        if team1 == team2:
+            return jsonify({"error": "Teams must be different"}), 400
+
+        # Preluă datele evenimentului
+        report_df, event_name = get_event_season_report(event_code, season)
+
+        if report_df is None:
+            return jsonify({"error": "Event not found"}), 404
+
+        if int(team1) not in get_team_index(report_df):
+            return jsonify({"error": f"Team {team1} not found in event"}), 404
+        if int(team2) not in get_team_index(report_df):
+            return jsonify({"error": f"Team {team2} not found in event"}), 404
+        if len(report_df) < 4:
+            return jsonify({"error": "Comparison failed"}), 500
+
+        n_simulations, seed = get_simulation_params(request.json)
+        chunk_size = get_chunk_size(request.json, n_simulations)
+        print(f"⚔️ Incepe comparare (stream) {n_simulations} regionale: {team1} vs {team2}...")
+
+        team1, team2 = int(team1), int(team2)
+        return streaming_response(stream_simulation_progress(
+            report_df, [team1, team2], 6, n_simulations, seed, chunk_size,
+            summarize=lambda positions, wins: summarize_team_comparison(
+                team1, team2, positions, wins, n_simulations
+            )
+        ))
+
+    except SimulationParamsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Eroare comparare: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Starea unui job de simulare (queued, running, done, failed, cancelled) și progresul lui"""
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(dict(job_status(job), success=True)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Rezultatul unui job terminat (același format ca endpoint-ul sincron); 202 cât timp rulează"""
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        if job['status'] in JOB_ACTIVE_STATES:
+            return jsonify(dict(job_status(job), success=True)), 202
+        if job['status'] != 'done':
+            return jsonify({"error": job['error'] or f"Job {job['status']}", "status": job['status']}), 409
+        return jsonify(job['result']), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Anulează un job de simulare"""
+    try:
+        job = cancel_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(dict(job_status(job), success=True)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/simulate-field/<event_code>', methods=['POST'])
+def simulate_field(event_code):
+    """
+    Distribuția locurilor pentru toate echipele evenimentului dintr-un singur batch
+    de simulări (body: simulations=100, seed). Rezultatul se păstrează în cache
+    pentru versiunea curentă a datelor raportului.
+    """
+    try:
+        season = request.args.get('season', 2025, type=int)
+        payload = request.get_json(silent=True) or {}
+
+        # Preluă datele evenimentului
+        report_df, event_name = get_event_season_report(event_code, season)
+
+        if report_df is None:
+            return jsonify({"error": "Event not found"}), 404
+
+        n_simulations, seed = get_simulation_params(payload)
+        memo_key = simulation_memo_key('field', event_code, season, [], n_simulations, 6, seed, report_df)
+        field_results = get_simulation_memo(memo_key)
+        if field_results is None:
+            print(f"📊 Incepe simulare {n_simulations} regionale pentru tot terenul {event_code}...")
+            field_results = run_field_simulation(
+                report_df, matches_per_team=6, n_simulations=n_simulations, seed=seed
+            )
+
+            if not field_results:
+                return jsonify({"error": "Simulation failed"}), 500
+
+            set_simulation_memo(memo_key, field_results)
+
+        return jsonify({
+            "success": True,
+            "event": event_code,
+            "event_name": event_name,
+            "season": season,
+            "simulation_type": "field",
+            "results": field_results
+        }), 200
+
+    except SimulationParamsError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Eroare simulare teren: {e}")
+        return jsonify({"error": str(e)}), 500
+
 # Servește frontend-ul React
 
 @app.route('/')
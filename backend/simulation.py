@@ -0,0 +1,117 @@
+"""
+Motorul de simulare vectorizat (NumPy).
+Modulul nu are efecte la import (fără Flask, cache sau thread-uri), ca procesele
+worker din pool-ul de simulări să-l poată încărca în siguranță.
+"""
+import os
+
+import numpy as np
+
+SIM_BATCH_SIZE = int(os.environ.get('SIM_BATCH_SIZE', 2000))
+
+def generate_schedules_batch(num_teams, matches_per_team, n_sims, rng):
+    """
+    Generează n_sims programe aleatoare ca array de indici (n_sims, meciuri, 4):
+    coloanele 0-1 sunt alianța roșie, 2-3 cea albastră.
+    Fiecare "rundă" este o permutare a tuturor echipelor, deci numărul de meciuri per
+    echipă diferă cu cel mult 1 (ca în generate_ftc_schedule_pro).
+    """
+    total_matches = int(num_teams * matches_per_team / 4)
+    rounds = -(-total_matches * 4 // num_teams)  # ceil
+    slots = np.argsort(rng.random((n_sims, rounds, num_teams)), axis=-1).reshape(n_sims, -1)
+    schedules = slots[:, :total_matches * 4].reshape(n_sims, total_matches, 4)
+
+    # La granița dintre două runde aceeași echipă poate apărea de două ori într-un meci.
+    # Cazurile sunt rare, așa că le reparăm individual, schimbând slotul cu meciul vecin.
+    sorted_matches = np.sort(schedules, axis=-1)
+    bad_sims, bad_matches = np.nonzero((sorted_matches[..., 1:] == sorted_matches[..., :-1]).any(axis=-1))
+    for sim, match in zip(bad_sims, bad_matches):
+        _repair_duplicate_slots(schedules[sim], match)
+    return schedules
+
+def _repair_duplicate_slots(schedule, match):
+    """Schimbă echipele duplicate din `match` cu sloturi din meciurile vecine, fără a crea alte duplicate"""
+    row = schedule[match]
+    _, first_idx = np.unique(row, return_index=True)
+    for dup_slot in [i for i in range(4) if i not in first_idx]:
+        swapped = False
+        for other in (match + 1, match - 1, match + 2, match - 2):
+            if swapped or not 0 <= other < len(schedule):
+                continue
+            for slot in range(4):
+                candidate = schedule[other, slot]
+                if candidate not in row and row[dup_slot] not in np.delete(schedule[other], slot):
+                    schedule[other, slot], row[dup_slot] = row[dup_slot], candidate
+                    swapped = True
+                    break
+
+def simulate_regionals_batch(field, n_sims, matches_per_team=6, rng=None, batch_size=None):
+    """
+    Motorul vectorizat: simulează n_sims regionale deodată.
+    Logica per meci este cea din calculate_predicted_rankings_stochastic:
+    RP din task-uri (media ratelor alianței), +3 pentru alianța cu OPR mai mare,
+    TBP1 = suma totalPointsNp a alianței; clasament după (Ranking Score, TBP1).
+    Returnează {'positions': (n_sims, echipe), 'wins': (n_sims, echipe)}.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    batch_size = batch_size or SIM_BATCH_SIZE
+    positions, wins = [], []
+    for start in range(0, n_sims, batch_size):
+        batch = _simulate_regionals_chunk(field, min(batch_size, n_sims - start), matches_per_team, rng)
+        positions.append(batch['positions'])
+        wins.append(batch['wins'])
+    return {'positions': np.concatenate(positions), 'wins': np.concatenate(wins)}
+
+def _simulate_regionals_chunk(field, n_sims, matches_per_team, rng):
+    num_teams = len(field['teams'])
+    schedules = generate_schedules_batch(num_teams, matches_per_team, n_sims, rng)
+    red, blue = schedules[..., :2], schedules[..., 2:]
+
+    # RP din task-uri: câte o aruncare per RP, cu probabilitatea = media celor doi roboți
+    rates = field['rp_rates']
+    red_tasks = (rng.random(red.shape[:2] + (3,)) < rates[red].mean(axis=2)).sum(axis=-1)
+    blue_tasks = (rng.random(blue.shape[:2] + (3,)) < rates[blue].mean(axis=2)).sum(axis=-1)
+
+    # Win bonus pe baza OPR
+    red_opr = field['opr'][red].sum(axis=-1)
+    blue_opr = field['opr'][blue].sum(axis=-1)
+    red_win = red_opr > blue_opr
+    blue_win = blue_opr > red_opr
+    red_rp = red_tasks + 3 * red_win
+    blue_rp = blue_tasks + 3 * blue_win
+
+    red_net = field['net'][red].sum(axis=-1)
+    blue_net = field['net'][blue].sum(axis=-1)
+
+    # Acumulăm per (simulare, echipă) cu bincount pe indici aplatizați
+    offsets = (np.arange(n_sims) * num_teams)[:, None, None]
+    flat_teams = np.concatenate([red + offsets, blue + offsets], axis=-1).ravel()
+    size = n_sims * num_teams
+
+    def per_team(red_values, blue_values):
+        values = np.concatenate([
+            np.repeat(red_values[..., None], 2, axis=-1),
+            np.repeat(blue_values[..., None], 2, axis=-1),
+        ], axis=-1).ravel()
+        return np.bincount(flat_teams, weights=values, minlength=size).reshape(n_sims, num_teams)
+
+    rp_sum = per_team(red_rp, blue_rp)
+    tbp1_sum = per_team(red_net, blue_net)
+    win_count = per_team(red_win, blue_win).astype(np.int64)
+    matches = np.bincount(flat_teams, minlength=size).reshape(n_sims, num_teams)
+
+    safe_matches = np.maximum(matches, 1)
+    ranking_score = np.where(matches > 0, np.round(rp_sum / safe_matches, 2), 0)
+    tbp1 = np.where(matches > 0, np.round(tbp1_sum / safe_matches, 2), 0)
+
+    # Clasament: Ranking Score desc, TBP1 desc, apoi ordinea din teams_data (sortare stabilă)
+    tie_break = np.broadcast_to(np.arange(num_teams), (n_sims, num_teams))
+    order = np.lexsort((tie_break, -tbp1, -ranking_score), axis=-1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(1, num_teams + 1)[None, :].repeat(n_sims, axis=0), axis=1)
+
+    return {'positions': positions, 'wins': win_count}
+
+def run_simulation_shard(field, n_sims, matches_per_team, seed_seq):
+    """Un shard de simulări, rulat într-un proces worker (punctul de intrare al pool-ului)"""
+    return simulate_regionals_batch(field, n_sims, matches_per_team, np.random.default_rng(seed_seq))